@@ -0,0 +1,208 @@
+"""
+Batch color_sort solver.
+
+Levels are read from a JSON lines file, one level per line:
+
+    {"id": "level-1", "tubes": [["TE", "BL", "BL", "PU"], ["BL", "PU", "GY", "FU"], []]}
+
+or from a CSV file with the level id in the first column and one tube per
+column after it, colors separated by spaces:
+
+    level-1,TE BL BL PU,BL PU GY FU,
+
+Colors are given top of the tube first, as in Tube(), either by value ('TE')
+or by name ('teal'). JSON levels may also set "capacity", "pour" and "goal"
+to play by other Rules. Levels are solved across a pool of worker processes and
+one JSON line is written per level as soon as it finishes, with an "error"
+for a level that can't be read or solved. With a checkpoint file, the ids of
+levels that were solved or found unsolvable are recorded there and skipped
+when the batch is run again; levels that failed or timed out are tried again.
+
+    python batch.py levels.jsonl --workers 8 --timeout 10 --checkpoint done.txt > results.jsonl
+"""
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cache import StateCache
+from color import Color
+from puzzle import Puzzle, solve, solve_astar, solve_optimal
+from rules import Rules
+from tube import Tube
+
+
+SOLVERS = ('astar', 'dfs', 'optimal')
+
+
+class LevelTimeout(Exception):
+    pass
+
+
+def parse_color(code):
+    try:
+        return Color(code)
+    except ValueError:
+        return Color[code]
+
+
+def read_levels(path):
+    """
+    Yields (id, tubes, rules) for every level in a .jsonl or .csv file, where
+    tubes is a list of lists of color codes and rules the keyword arguments
+    for Rules(). A line that isn't a level is yielded as its error record
+    instead, so the rest of the file can still be solved.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            for idx, row in enumerate(csv.reader(f)):
+                if not row:
+                    continue
+
+                yield row[0] or str(idx), [cell.split() for cell in row[1:]], {}
+        else:
+            for idx, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    level = json.loads(line)
+                except ValueError as e:
+                    yield {'id': str(idx), 'error': 'not valid JSON: {}'.format(e)}
+                    continue
+
+                if not isinstance(level, dict):
+                    yield {'id': str(idx), 'error': 'a level must be a JSON object'}
+                    continue
+
+                level_id = str(level.get('id', idx))
+                if 'tubes' not in level:
+                    yield {'id': level_id, 'error': "level has no 'tubes'"}
+                    continue
+
+                rules = {k: level[k] for k in ('capacity', 'pour', 'goal') if k in level}
+                yield level_id, level['tubes'], rules
+
+
+def read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return set()
+
+    with open(path) as f:
+        return set(line.strip() for line in f if line.strip())
+
+
+def make_puzzle(tubes, rules=None):
+    rules = Rules(**rules) if rules else Rules()
+    return Puzzle([
+        Tube([parse_color(c) for c in colors], tid=idx + 1, capacity=rules.capacity)
+        for idx, colors in enumerate(tubes)
+    ], rules=rules)
+
+
+def on_alarm(signum, frame):
+    raise LevelTimeout
+
+
+def solve_level(level_id, tubes, solver='astar', timeout=None, rules=None):
+    """
+    Worker entry point. Returns the JSON record for one level.
+    """
+    record = {'id': level_id}
+    start = time.perf_counter()
+
+    if timeout:
+        signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        p = make_puzzle(tubes, rules)
+        if solver == 'dfs':
+            solved, _, path = solve(p, 50, [], StateCache())
+        elif solver == 'optimal':
+            solved, _, path = solve_optimal(p)
+        else:
+            solved, _, path = solve_astar(p, 'breaks', 2)
+
+        record['solved'] = solved
+        record['pours'] = len(path) if solved else None
+        record['path'] = path if solved else None
+    except LevelTimeout:
+        record['error'] = 'timeout'
+    except Exception as e:
+        record['error'] = repr(e)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    record['seconds'] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def solve_batch(levels, workers=None, solver='astar', timeout=None, done=()):
+    """
+    Solves every (id, tubes, rules) level not in `done` and yields the records as
+    they finish, keeping at most a few levels per worker in flight. Error
+    records from read_levels() are passed straight through.
+    """
+    workers = workers or os.cpu_count()
+    levels = iter(levels)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 4:
+                level = next(levels, None)
+                if level is None:
+                    exhausted = True
+                elif isinstance(level, dict):
+                    yield level
+                elif level[0] not in done:
+                    level_id, tubes, rules = level
+                    pending.add(pool.submit(solve_level, level_id, tubes, solver, timeout, rules))
+
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve many color_sort levels')
+    parser.add_argument('levels', help='.jsonl or .csv file of levels')
+    parser.add_argument('--workers', type=int, help='worker processes, all cores by default')
+    parser.add_argument('--solver', choices=SOLVERS, default='astar')
+    parser.add_argument('--timeout', type=float, help='seconds allowed per level')
+    parser.add_argument('--checkpoint', help='file of solved or unsolvable level ids, skipped and appended to')
+    args = parser.parse_args(argv)
+
+    done = read_checkpoint(args.checkpoint)
+    checkpoint = open(args.checkpoint, 'a') if args.checkpoint else None
+
+    count = 0
+    start = time.perf_counter()
+    try:
+        for record in solve_batch(read_levels(args.levels), args.workers, args.solver, args.timeout, done):
+            print(json.dumps(record), flush=True)
+            # Errors and timeouts have no result, so they are tried again
+            if checkpoint and 'solved' in record:
+                checkpoint.write(record['id'] + '\n')
+                checkpoint.flush()
+            count += 1
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    elapsed = time.perf_counter() - start
+    print('{} levels in {:.2f} s, {:.1f} levels/s'.format(count, elapsed, count / elapsed if elapsed else 0), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
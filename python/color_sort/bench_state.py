@@ -0,0 +1,73 @@
+"""
+Allocation benchmark for the color_sort search state.
+
+Reports how many memory blocks and bytes one search node holds on to, for the
+Puzzle.copy() the recursive solver makes at every level and for a pure pour()
+on the packed state, plus the solver's wall time on the sample puzzle.
+
+    python bench_state.py
+"""
+import time
+import tracemalloc
+
+import puzzle
+import state
+from puzzle import Puzzle, solve
+from tube import Tube
+
+
+NODES = 2000
+
+
+def sample_tubes():
+    return [
+        Tube([puzzle.teal, puzzle.blue, puzzle.blue, puzzle.purple], tid=1),
+        Tube([puzzle.blue, puzzle.purple, puzzle.grey, puzzle.fusia], tid=2),
+        Tube([puzzle.grey, puzzle.purple, puzzle.pink, puzzle.pink], tid=3),
+        Tube([puzzle.green, puzzle.orange, puzzle.pink, puzzle.lblue], tid=4),
+        Tube([puzzle.lblue, puzzle.fusia, puzzle.green, puzzle.yellow], tid=5),
+        Tube([puzzle.lg, puzzle.lg, puzzle.lblue, puzzle.yellow], tid=6),
+        Tube([puzzle.purple, puzzle.blue, puzzle.yellow, puzzle.green], tid=7),
+        Tube([puzzle.red, puzzle.orange, puzzle.teal, puzzle.yellow], tid=8),
+        Tube([puzzle.lg, puzzle.grey, puzzle.orange, puzzle.teal], tid=9),
+        Tube([puzzle.pink, puzzle.fusia, puzzle.fusia, puzzle.teal], tid=10),
+        Tube([puzzle.red, puzzle.red, puzzle.lg, puzzle.lblue], tid=11),
+        Tube([puzzle.grey, puzzle.orange, puzzle.red, puzzle.green], tid=12),
+        Tube(tid=13),
+        Tube(tid=14),
+    ]
+
+
+def measure(make):
+    # Keep every node alive so the snapshot sees what a node retains
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    nodes = [make() for _ in range(NODES)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del nodes
+    return blocks / NODES, size / NODES
+
+
+def report(name, blocks, size):
+    print('{:<20} {:>8.1f} blocks/node {:>10.1f} bytes/node'.format(name, blocks, size))
+
+
+def main():
+    p = Puzzle(sample_tubes())
+    report('Puzzle.copy()', *measure(p.copy))
+
+    s = p.state()
+    report('state.pour()', *measure(lambda: state.pour(s, 0, 12)))
+
+    start = time.perf_counter()
+    solve(Puzzle(sample_tubes()), 50, [])
+    print('{:<20} {:>8.3f} s'.format('solve()', time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
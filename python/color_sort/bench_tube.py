@@ -0,0 +1,33 @@
+"""
+Micro-benchmark of the Tube operations the recursive solver calls in its
+inner loop.
+
+    python bench_tube.py
+"""
+import timeit
+
+from color import Color, ColorBox
+from tube import Tube
+
+
+NUMBER = 200000
+
+
+def bench(name, stmt, setup):
+    best = min(timeit.repeat(stmt, setup, number=NUMBER, repeat=5, globals=globals()))
+    print('{:<24} {:>8.1f} ns/op'.format(name, best / NUMBER * 1e9))
+
+
+def main():
+    partial = 't = Tube([Color.red, Color.red, Color.blue], tid=1); red = ColorBox(Color.red); blue = ColorBox(Color.blue)'
+    bench('fits (match)', 't.fits(red)', partial)
+    bench('fits (no match)', 't.fits(blue)', partial)
+    bench('is_full', 't.is_full()', partial)
+    bench('solved', 't.solved()', partial)
+    bench('push + pop', 't.push(red); t.pop()', partial)
+    bench('pop + push', 't.push(t.pop())', partial)
+    bench('copy', 't.copy()', partial)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+
+DEFAULT_MAX_ENTRIES = 1000000
+
+
+class StateCache:
+    """
+    Bounded LRU table of puzzle states the search has already visited.
+
+    Each entry remembers the largest remaining depth the state was explored
+    with, so a state is only pruned if it was previously searched at least
+    as deeply as it would be now.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def seen(self, key, depth=0):
+        """
+        Returns True if `key` was already visited with at least `depth` moves
+        left, otherwise records it and returns False.
+        """
+        known = self._entries.get(key)
+        if known is not None and known >= depth:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        self._entries[key] = depth
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return False
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return 'cache: {} entries, {} hits, {} misses'.format(len(self), self.hits, self.misses)
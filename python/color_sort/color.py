@@ -17,6 +17,8 @@ class Color(Enum):
 
 
 class ColorBox:
+    __slots__ = ('color', 'count')
+
     def __init__(self, color, count=1):
         self.color = color
         self.count = count
@@ -0,0 +1,128 @@
+"""
+Iterative depth first color_sort search.
+
+SearchEngine runs the same search as solve(), trying pours in the same
+order (including solve() moving emptied tubes to the back, as Puzzle.copy()
+does), but keeps its own stack of frames instead of recursing, so the depth
+is only limited by memory. It can stop after a number of nodes and pick up
+where it left off, and its stack can be dumped to a JSON friendly dict and
+loaded again later, in another process if need be.
+"""
+from puzzle import Puzzle, result_from_state
+from rules import STANDARD, Rules
+import state
+
+
+class SearchEngine:
+
+    def __init__(self, puzzle=None, count=50, cache=None):
+        self.cache = cache
+        self.rules = STANDARD
+        self.start = ()
+        self.tids = []
+        # Frames are [state, moves left, tube order, pours to try or None if not expanded yet, next pour]
+        self.stack = []
+        # (src, dst) pour that led to each frame after the first
+        self.path = []
+        self.nodes = 0
+        self.solved = False
+
+        if puzzle is not None:
+            self.rules = puzzle.rules
+            self.start = puzzle.state()
+            self.tids = puzzle.tids()
+            self.stack.append([self.start, count, state.empty_last(self.start), None, 0])
+
+    def run(self, max_nodes=None):
+        """
+        Searches until a solution is found (returns True), the tree is
+        exhausted (returns False), or `max_nodes` more nodes were visited
+        (returns None, call run() again to carry on).
+        """
+        limit = None if max_nodes is None else self.nodes + max_nodes
+        moves_from = self.rules.moves
+        pour = self.rules.pour
+        solved = self.rules.solved
+        while self.stack:
+            frame = self.stack[-1]
+            s, count, order, moves, nxt = frame
+
+            if moves is None:
+                if limit is not None and self.nodes >= limit:
+                    return None
+
+                self.nodes += 1
+                if solved(s):
+                    self.solved = True
+                    return True
+
+                # Out of moves, or already explored with at least as many moves left
+                if count <= 0 or (self.cache is not None and self.cache.seen(state.canonical(s), count)):
+                    self.pop()
+                    continue
+
+                moves = frame[3] = list(moves_from(s, order))
+
+            if nxt == len(moves):
+                self.pop()
+                continue
+
+            frame[4] += 1
+            src, dst = moves[nxt]
+            child = pour(s, src, dst)
+            self.path.append((src, dst))
+            self.stack.append([child, count - 1, state.empty_last(child, order), None, 0])
+
+        return False
+
+    def pop(self):
+        self.stack.pop()
+        if self.path:
+            self.path.pop()
+
+    def result(self):
+        """
+        Returns the (solved, puzzle, path) tuple solve() would, once run()
+        returned True or False.
+        """
+        puzzle = Puzzle.from_state(self.start, self.tids, self.rules)
+        if not self.solved:
+            return False, puzzle, []
+
+        return result_from_state(puzzle, self.stack[-1][0], self.path)
+
+    def dump(self):
+        return {
+            'rules': list(self.rules.key()),
+            'start': [t.hex() for t in self.start],
+            'tids': self.tids,
+            'nodes': self.nodes,
+            'solved': self.solved,
+            'path': [list(m) for m in self.path],
+            'stack': [
+                [[t.hex() for t in s], count, list(order), moves is not None, nxt]
+                for s, count, order, moves, nxt in self.stack
+            ],
+        }
+
+    @staticmethod
+    def load(data, cache=None):
+        engine = SearchEngine(cache=cache)
+        engine.rules = Rules(*data['rules'])
+        engine.start = tuple(bytes.fromhex(t) for t in data['start'])
+        engine.tids = data['tids']
+        engine.nodes = data['nodes']
+        engine.solved = data['solved']
+        engine.path = [tuple(m) for m in data['path']]
+        for tubes, count, order, expanded, nxt in data['stack']:
+            s = tuple(bytes.fromhex(t) for t in tubes)
+            moves = list(engine.rules.moves(s, order)) if expanded else None
+            engine.stack.append([s, count, tuple(order), moves, nxt])
+
+        return engine
+
+
+def solve_iterative(puzzle, count, cache=None):
+    engine = SearchEngine(puzzle, count, cache)
+    engine.run()
+    return engine.result()
@@ -0,0 +1,74 @@
+"""
+Estimates of the number of pours left, used to guide solve_astar() and
+solve_ida(). All of them take a packed state (see state.py) and, unless noted,
+never overestimate, so A* and IDA* still find the shortest solution.
+
+New heuristics are added with the @register decorator and picked by name.
+"""
+import state
+
+
+HEURISTICS = {}
+
+
+def register(name):
+    def wrap(func):
+        HEURISTICS[name] = func
+        return func
+
+    return wrap
+
+
+def get(name):
+    if name not in HEURISTICS:
+        raise KeyError('unknown heuristic {}, expected one of {}'.format(name, ', '.join(sorted(HEURISTICS))))
+
+    return HEURISTICS[name]
+
+
+@register('zero')
+def zero(the_state):
+    # Plain uniform cost search
+    return 0
+
+
+@register('spread')
+def spread(the_state):
+    return state.lower_bound(the_state)
+
+
+@register('breaks')
+def breaks(the_state):
+    """
+    Color changes inside each tube, i.e. runs not at the bottom of a tube.
+    A pour removes at most one of them, from the tube it pours out of.
+    """
+    total = 0
+    for t in the_state:
+        for i in range(1, len(t)):
+            if t[i] != t[i - 1]:
+                total += 1
+
+    return total
+
+
+@register('runs')
+def runs(the_state):
+    """
+    Runs of each color beyond the one it ends up as. A pour merges at most
+    one run into another.
+    """
+    per_color = {}
+    for t in the_state:
+        last = None
+        for c in t:
+            if c != last:
+                per_color[c] = per_color.get(c, 0) + 1
+            last = c
+
+    return sum(n - 1 for n in per_color.values())
+
+
+@register('max')
+def most(the_state):
+    return max(breaks(the_state), runs(the_state))
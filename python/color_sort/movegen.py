@@ -0,0 +1,107 @@
+from rules import STANDARD
+
+
+class MoveGenerator:
+    """
+    Generates the pours worth trying from a packed state. On top of the legal
+    moves from the rules it drops pours that lead to a state symmetric to
+    one already generated, or that undo the previous pour, and puts the most
+    promising pours first.
+
+    `pruned` counts the moves each rule removed:
+        empty       pouring into an empty tube other than the first one
+        identical   pouring from or into a tube identical to an earlier one
+        single-run  pouring between two single color tubes in the second
+                    direction, only when whole runs are poured
+        reverse     undoing the previous pour
+    """
+
+    RULES = ('empty', 'identical', 'single-run', 'reverse')
+
+    def __init__(self, order=True, rules=STANDARD):
+        self.order = order
+        self.rules = rules
+        # With single unit pours the two directions give different states
+        self.single_runs = rules.pour_mode == 'run'
+        self.pruned = dict.fromkeys(self.RULES, 0)
+
+    def moves(self, the_state, last=None):
+        """
+        Returns the list of (src, dst) pours to try, `last` being the
+        (src, dst) pour that led to this state.
+        """
+        first = {}
+        for idx, t in enumerate(the_state):
+            first.setdefault(t, idx)
+
+        result = []
+        targets = set()
+        current = None
+        for src, dst in self.rules.moves(the_state):
+            if src != current:
+                # Destinations already poured into from this source
+                targets = set()
+                current = src
+
+            rule = self.rule(the_state, src, dst, last, first, targets)
+            targets.add(the_state[dst])
+            if rule is not None:
+                self.pruned[rule] += 1
+                continue
+
+            result.append((src, dst))
+
+        if self.order:
+            result.sort(key=lambda m: -score(the_state, m[0], m[1], self.rules))
+
+        return result
+
+    def rule(self, the_state, src, dst, last, first, targets):
+        if last is not None and src == last[1] and dst == last[0]:
+            return 'reverse'
+
+        s = the_state[src]
+        d = the_state[dst]
+        if not d:
+            return 'empty' if d in targets else None
+
+        if first[s] != src or d in targets:
+            return 'identical'
+
+        if self.single_runs and dst < src and single_run(s) and single_run(d):
+            return 'single-run'
+
+        return None
+
+    def total(self):
+        return sum(self.pruned.values())
+
+    def __str__(self):
+        return 'pruned: ' + ', '.join('{} {}'.format(r, self.pruned[r]) for r in self.RULES)
+
+
+def single_run(tube):
+    return tube.count(tube[0]) == len(tube)
+
+
+def score(the_state, src, dst, rules=STANDARD):
+    """
+    Cheap ordering score, higher is tried first: pours that fill a tube with
+    one color, merge onto a matching color, or leave the source tube empty or
+    a single color.
+    """
+    s = the_state[src]
+    d = the_state[dst]
+    count = rules.amount(s)
+
+    points = 0
+    if d:
+        points += 2
+        if len(d) + count == rules.capacity and single_run(d):
+            points += 3
+
+    rest = s[:-count]
+    if not rest or single_run(rest):
+        points += 1
+
+    return points
@@ -0,0 +1,140 @@
+"""
+Multi-process color_sort solver.
+
+The first levels of the move tree are expanded in the parent process and
+every resulting branch is searched depth first in a worker. Branches are sent
+to the workers as packed states (tuples of bytes, see state.py), and a shared
+event tells every worker to stop as soon as one of them finds a solution.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import StateCache
+from puzzle import result_from_state
+from rules import STANDARD
+import state
+
+
+# How many nodes search() visits between looks at the found event
+FOUND_CHECK = 1024
+
+# Set in each worker by init_worker()
+found = None
+# Nodes searched by this worker, and whether it has seen the event set
+nodes = 0
+stopped = False
+
+
+def init_worker(event):
+    global found, nodes, stopped
+    found = event
+    nodes = 0
+    stopped = False
+
+
+def split(the_state, levels, count, rules=STANDARD):
+    """
+    Returns the (moves, state) branches `levels` pours below `the_state`, in
+    rules.moves() order.
+    """
+    branches = [([], the_state)]
+    for _ in range(min(levels, count)):
+        next_branches = []
+        for moves, s in branches:
+            if rules.solved(s):
+                next_branches.append((moves, s))
+                continue
+
+            for src, dst in rules.moves(s):
+                next_branches.append((moves + [(src, dst)], rules.pour(s, src, dst)))
+
+        branches = next_branches
+
+    return branches
+
+
+def search(the_state, count, moves, cache, rules):
+    global nodes, stopped
+    if rules.solved(the_state):
+        return True
+
+    if count <= 0 or stopped:
+        return False
+
+    # Checking the event takes a lock shared between processes, so it is
+    # only done every FOUND_CHECK nodes
+    nodes += 1
+    if not nodes % FOUND_CHECK and found.is_set():
+        stopped = True
+        return False
+
+    if cache.seen(state.canonical(the_state), count):
+        return False
+
+    for src, dst in rules.moves(the_state):
+        moves.append((src, dst))
+        if search(rules.pour(the_state, src, dst), count - 1, moves, cache, rules):
+            return True
+
+        moves.pop()
+
+    return False
+
+
+def solve_branch(the_state, count, rules=STANDARD):
+    """
+    Worker entry point: depth first search below one branch. Returns the
+    list of (src, dst) pours that solves it, or None.
+    """
+    moves = []
+    if search(the_state, count, moves, StateCache(), rules):
+        found.set()
+        return moves
+
+    return None
+
+
+def solve_parallel(puzzle, workers=None, count=50, levels=None):
+    """
+    Same as solve(puzzle, count, []) but spread over `workers` processes
+    (all cores by default). Returns the (solved, puzzle, path) tuple of the
+    first branch that finds a solution. `levels` is how many pours deep the
+    tree is split, by default one, or two if that doesn't give every worker
+    a few branches.
+    """
+    workers = workers or os.cpu_count()
+    rules = puzzle.rules
+    start = puzzle.state()
+    if rules.solved(start):
+        return True, puzzle, []
+
+    if levels is None:
+        levels = 1
+        if len(split(start, 1, count, rules)) < workers * 2:
+            levels = 2
+
+    branches = split(start, levels, count, rules)
+    event = multiprocessing.Event()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(event,)) as pool:
+        futures = {
+            pool.submit(solve_branch, s, count - len(moves), rules): moves
+            for moves, s in branches
+        }
+        for future in as_completed(futures):
+            rest = future.result()
+            if rest is None:
+                continue
+
+            event.set()
+            for other in futures:
+                other.cancel()
+
+            moves = futures[future] + rest
+            final = start
+            for src, dst in moves:
+                final = rules.pour(final, src, dst)
+
+            return result_from_state(puzzle, final, moves)
+
+    return False, puzzle, []
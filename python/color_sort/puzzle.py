@@ -1,7 +1,15 @@
+import argparse
 import os
+from cache import StateCache
 from color import Color, ColorBox
+from movegen import MoveGenerator
+from rules import STANDARD
 from collections import defaultdict
+import heapq
+import heuristic
+import itertools
 from tube import Tube
+import state
 
 
 purple = Color.purple
@@ -20,20 +28,24 @@ fusia  = Color.fusia
 
 class Puzzle:
 
-    def __init__(self, tubes=[], ignore_color_check=False):
+    def __init__(self, tubes=[], ignore_color_check=False, rules=STANDARD):
+        self.rules = rules
         empty = []
         self.tubes = []
         c_count = defaultdict(int)
         for t in tubes:
+            if t.capacity != rules.capacity:
+                t.capacity = rules.capacity
+
             if t.is_empty():
                 empty.append(t)
             else:
                 self.tubes.append(t)
-                for c in t.colors:
-                    c_count[c.color] += c.count
+                for c in t.units:
+                    c_count[state.COLORS[c]] += 1
 
         for c, val in c_count.items():
-            if (val % 4) != 0:
+            if rules.goal == 'full' and (val % rules.capacity) != 0:
                 if not ignore_color_check:
                     raise Exception("missing {}, got {}".format(c, val))
 
@@ -44,10 +56,34 @@ class Puzzle:
         return len(self.tubes) == 0
 
     def solved(self):
-        return all([t.solved() for t in self.tubes])
+        if self.rules.goal == 'full':
+            # Each tube already tracks whether it's full of one color
+            return all([t.solved() for t in self.tubes])
+
+        return self.rules.solved(self.state())
 
     def copy(self):
-        return Puzzle([t.copy() for t in self.tubes])
+        return Puzzle([t.copy() for t in self.tubes], rules=self.rules)
+
+    def state(self):
+        return tuple(t.units for t in self.tubes)
+
+    def tids(self):
+        return [t.tid for t in self.tubes]
+
+    @staticmethod
+    def from_state(the_state, tids, rules=STANDARD):
+        p = Puzzle(rules=rules)
+        for units, tid in zip(the_state, tids):
+            t = Tube(tid=tid, capacity=rules.capacity)
+            t.units = units
+            p.tubes.append(t)
+
+        return p
+
+    def key(self):
+        # Canonical encoding of the tube contents, ignoring tube order and tid
+        return state.canonical(self.state())
 
     def pop(self):
         if self.is_empty():
@@ -84,7 +120,7 @@ def log_nn(msg):
         print(msg, end='')
 
 
-def solve(puzzle, count, path):
+def solve(puzzle, count, path, cache=None, movegen=None):
     if count < 0:
         raise Exception
 
@@ -95,11 +131,19 @@ def solve(puzzle, count, path):
     if puzzle.is_empty():
         return False, puzzle, path
 
+    # Already explored this state (or are exploring it further up the path) with at least as many moves left
+    if cache is not None and cache.seen(puzzle.key(), count):
+        return False, puzzle, path
+
     log('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
     puzzle.dump()
 
     p = puzzle.copy()
 
+    # Generated moves for pruning or rules the Tube methods don't follow
+    if movegen is not None or p.rules.pour_mode != 'run':
+        return solve_packed(p, count, path, cache, movegen)
+
     for curr_tube in p.tubes:
         if curr_tube.is_empty():
             continue
@@ -118,19 +162,19 @@ def solve(puzzle, count, path):
             # Check if the top color from the current tube fits in the candidate tube
             if candidate.fits(curr_color):
                 # Keep track of the candidate colors so we can restore them if the recursion doesn't succeed
-                candidate_colors = candidate.copy_colors()
+                candidate_colors = candidate.units
                 # It fits, so pour it into the candidate tube
                 candidate.push(curr_color)
                 
                 path.append((curr_tube.tid, candidate.tid))
 
                 # And recurse to solve
-                solved, the_puzzle, the_path = solve(p, count - 1, path)
+                solved, the_puzzle, the_path = solve(p, count - 1, path, cache)
                 if solved:
                     return solved, the_puzzle, the_path
                 
                 # We couldn't find a solution, reset the candidate back to how it was before
-                candidate.colors = candidate_colors
+                candidate.units = candidate_colors
                 path.pop()
 
         # We couldn't find a spot for this color box, return it to the current tube
@@ -139,6 +183,213 @@ def solve(puzzle, count, path):
     return False, p, path
 
 
+def solve_packed(p, count, path, cache, movegen):
+    # The body of solve() when the pours come from the rules or a MoveGenerator
+    rules = p.rules
+    the_state = p.state()
+    if movegen is not None:
+        tids = p.tids()
+        last = None
+        if path:
+            last = (tids.index(path[-1][0]), tids.index(path[-1][1]))
+
+        candidates = movegen.moves(the_state, last)
+    else:
+        candidates = rules.moves(the_state)
+
+    for src, dst in candidates:
+        curr_tube = p.tubes[src]
+        candidate = p.tubes[dst]
+        n = rules.pour(the_state, src, dst)
+        curr_tube.units = n[src]
+        candidate.units = n[dst]
+
+        path.append((curr_tube.tid, candidate.tid))
+
+        solved, the_puzzle, the_path = solve(p, count - 1, path, cache, movegen)
+        if solved:
+            return solved, the_puzzle, the_path
+
+        curr_tube.units = the_state[src]
+        candidate.units = the_state[dst]
+        path.pop()
+
+    return False, p, path
+
+
+def result_from_state(puzzle, the_state, moves):
+    tids = puzzle.tids()
+    path = [(tids[src], tids[dst]) for src, dst in moves]
+    return True, Puzzle.from_state(the_state, tids, puzzle.rules), path
+
+
+def solve_optimal(puzzle, max_frontier=None):
+    """
+    Breadth first search for the shortest solution. Returns the same
+    (solved, puzzle, path) tuple as solve(), with len(path) being the minimum
+    number of pours.
+
+    If `max_frontier` is set and a BFS layer grows past that many states, the
+    search falls back to solve_ida(), which only keeps the current path in
+    memory.
+    """
+    rules = puzzle.rules
+    start = puzzle.state()
+    if rules.solved(start):
+        return True, puzzle, []
+
+    # canonical key -> (parent state, move), to rebuild the path at the end
+    parents = {state.canonical(start): None}
+    frontier = [start]
+    while frontier:
+        if max_frontier is not None and len(frontier) > max_frontier:
+            log('frontier of %d states is over budget, switching to IDA*' % len(frontier))
+            return solve_ida(puzzle, StateCache(max_frontier))
+
+        next_frontier = []
+        for s in frontier:
+            for src, dst in rules.moves(s):
+                n = rules.pour(s, src, dst)
+                key = state.canonical(n)
+                if key in parents:
+                    continue
+
+                parents[key] = (s, (src, dst))
+                if rules.solved(n):
+                    moves = []
+                    entry = parents[key]
+                    while entry is not None:
+                        parent, move = entry
+                        moves.append(move)
+                        entry = parents[state.canonical(parent)]
+
+                    return result_from_state(puzzle, n, reversed(moves))
+
+                next_frontier.append(n)
+
+        frontier = next_frontier
+
+    return False, puzzle, []
+
+
+def solve_ida(puzzle, cache=None, heuristic_name='spread'):
+    """
+    Iterative deepening A* using the named heuristic from heuristic.py,
+    state.lower_bound() by default. Finds a shortest
+    solution in memory proportional to its length, plus the optional
+    StateCache used to skip states already searched with at least as many
+    pours to spare in the current iteration.
+    """
+    h = heuristic.get(heuristic_name)
+    rules = puzzle.rules
+    start = puzzle.state()
+    moves = []
+    on_path = {state.canonical(start)}
+
+    def search(s, depth, bound):
+        estimate = depth + h(s)
+        if estimate > bound:
+            return estimate
+
+        if rules.solved(s):
+            return True
+
+        next_bound = None
+        for src, dst in rules.moves(s):
+            n = rules.pour(s, src, dst)
+            key = state.canonical(n)
+            if key in on_path:
+                continue
+
+            if cache is not None and cache.seen(key, bound - depth - 1):
+                continue
+
+            on_path.add(key)
+            moves.append((src, dst))
+            found = search(n, depth + 1, bound)
+            if found is True:
+                return found
+
+            moves.pop()
+            on_path.discard(key)
+            if found is None:
+                continue
+
+            if next_bound is None or found < next_bound:
+                next_bound = found
+
+        return next_bound
+
+    bound = h(start)
+    while bound is not None:
+        if cache is not None:
+            cache.clear()
+
+        found = search(start, 0, bound)
+        if found is True:
+            final = start
+            for src, dst in moves:
+                final = rules.pour(final, src, dst)
+
+            return result_from_state(puzzle, final, moves)
+
+        log('no solution within %d pours' % bound)
+        bound = found
+
+    return False, puzzle, []
+
+
+def solve_astar(puzzle, heuristic_name='runs', weight=1, movegen=None):
+    """
+    Best first (A*) search ordered by pours so far plus the named heuristic
+    from heuristic.py. Returns the same (solved, puzzle, path) tuple as
+    solve(). With an admissible heuristic and weight=1 the path is a shortest
+    one; a weight above 1 trades that guarantee for speed. An optional
+    MoveGenerator skips symmetric and undoing pours.
+    """
+    h = heuristic.get(heuristic_name)
+    rules = puzzle.rules
+    start = puzzle.state()
+    # Breaks ties between equal scores without comparing states
+    order = itertools.count()
+
+    # canonical key -> (fewest pours to reach it, parent state, move)
+    best = {state.canonical(start): (0, None, None)}
+    queue = [(weight * h(start), next(order), 0, start)]
+    while queue:
+        _, _, g, s = heapq.heappop(queue)
+        key = state.canonical(s)
+        if best[key][0] < g:
+            # Stale entry, a shorter route to this state was queued later
+            continue
+
+        if rules.solved(s):
+            moves = []
+            _, parent, move = best[key]
+            while parent is not None:
+                moves.append(move)
+                _, parent, move = best[state.canonical(parent)]
+
+            return result_from_state(puzzle, s, reversed(moves))
+
+        if movegen is not None:
+            candidates = movegen.moves(s, best[key][2])
+        else:
+            candidates = rules.moves(s)
+
+        for src, dst in candidates:
+            n = rules.pour(s, src, dst)
+            n_key = state.canonical(n)
+            known = best.get(n_key)
+            if known is not None and known[0] <= g + 1:
+                continue
+
+            best[n_key] = (g + 1, s, (src, dst))
+            heapq.heappush(queue, (g + 1 + weight * h(n), next(order), g + 1, n))
+
+    return False, puzzle, []
+
+
 if __name__ == '__main__':
     tubes = [
         Tube([teal, blue, blue, purple], tid=1),
@@ -158,7 +409,39 @@ if __name__ == '__main__':
     ]
     p = Puzzle(tubes)
 
-    solved, the_puzzle, the_path = solve(p, 50, [])
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--optimal', action='store_true', help='find the solution with the fewest pours')
+    parser.add_argument('--max-frontier', type=int, help='switch --optimal to IDA* past this many queued states')
+    parser.add_argument('--prune', action='store_true', help='skip symmetric and undoing pours, best looking pours first')
+    parser.add_argument('--iterative', action='store_true', help='depth first search without recursion')
+    parser.add_argument('--workers', type=int, help='search depth first across this many processes')
+    parser.add_argument('--heuristic', choices=sorted(heuristic.HEURISTICS), help='use the A* solver with this heuristic')
+    parser.add_argument('--weight', type=float, default=1, help='A* heuristic weight, above 1 is faster but not always shortest')
+    args = parser.parse_args()
+
+    if args.heuristic:
+        movegen = MoveGenerator(order=False) if args.prune else None
+        solved, the_puzzle, the_path = solve_astar(p, args.heuristic, args.weight, movegen)
+        if movegen is not None:
+            print(movegen)
+    elif args.iterative:
+        from engine import solve_iterative
+        cache = StateCache()
+        solved, the_puzzle, the_path = solve_iterative(p, 50, cache)
+        print(cache)
+    elif args.workers:
+        from parallel import solve_parallel
+        solved, the_puzzle, the_path = solve_parallel(p, args.workers, 50)
+    elif args.optimal:
+        solved, the_puzzle, the_path = solve_optimal(p, max_frontier=args.max_frontier)
+    else:
+        cache = StateCache()
+        movegen = MoveGenerator() if args.prune else None
+        solved, the_puzzle, the_path = solve(p, 50, [], cache, movegen)
+        print(cache)
+        if movegen is not None:
+            print(movegen)
+
     if solved:
         print('====================================================')
         the_puzzle.dump()
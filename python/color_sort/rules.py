@@ -0,0 +1,72 @@
+import state
+
+
+POURS = ('run', 'unit')
+GOALS = ('full', 'sorted')
+
+
+class Rules:
+    """
+    The rules of a color_sort variant:
+
+        capacity    units a tube holds
+        pour        'run' pours the whole top run and only if it all fits,
+                    'unit' pours one unit at a time
+        goal        'full' wants every tube empty or full of one color,
+                    'sorted' only wants every color in a tube of its own
+
+    The move generator, pour and goal test are built once for the rule set,
+    so the solvers call them without checking the rules on every move.
+    """
+
+    def __init__(self, capacity=state.MAX_SIZE, pour='run', goal='full'):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1, got {}'.format(capacity))
+        if pour not in POURS:
+            raise ValueError('pour must be one of {}, got {}'.format(', '.join(POURS), pour))
+        if goal not in GOALS:
+            raise ValueError('goal must be one of {}, got {}'.format(', '.join(GOALS), goal))
+
+        self.capacity = capacity
+        self.pour_mode = pour
+        self.goal = goal
+
+        if capacity == state.MAX_SIZE and pour == 'run':
+            self.moves = state.moves
+        else:
+            self.moves = state.make_moves(capacity, unit=pour == 'unit')
+
+        self.pour = state.pour_unit if pour == 'unit' else state.pour
+
+        if goal == 'sorted':
+            self.solved = state.sorted_solved
+        elif capacity == state.MAX_SIZE:
+            self.solved = state.solved
+        else:
+            self.solved = state.make_solved(capacity)
+
+    def amount(self, tube):
+        # Units the next pour out of `tube` moves
+        if self.pour_mode == 'unit':
+            return 1
+
+        return state.top_run(tube)[1]
+
+    def key(self):
+        return self.capacity, self.pour_mode, self.goal
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __reduce__(self):
+        # The generated functions can't be pickled, so rebuild them instead
+        return Rules, self.key()
+
+    def __repr__(self):
+        return 'Rules(capacity={}, pour={!r}, goal={!r})'.format(*self.key())
+
+
+STANDARD = Rules()
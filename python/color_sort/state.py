@@ -0,0 +1,224 @@
+"""
+Packed, immutable color_sort state.
+
+A tube is a `bytes` object with one color index per filled slot, bottom
+first, so the top of the tube is the last byte. A puzzle state is a tuple of
+tubes, in the same order as `Puzzle.tubes`. Moves are pure functions that
+return a new state and never touch the one they were given.
+"""
+from color import Color, ColorBox
+
+
+MAX_SIZE = 4
+
+COLORS = list(Color)
+INDEX = {c: i for i, c in enumerate(COLORS)}
+
+EMPTY = b''
+
+
+def pack(colors):
+    # `colors` is top first, the same order Tube() takes them in
+    return bytes(INDEX[c] for c in reversed(colors))
+
+
+def pack_boxes(boxes):
+    # `boxes` is a bottom first list of ColorBox, like Tube.colors
+    return b''.join(bytes([INDEX[b.color]]) * b.count for b in boxes)
+
+
+def unpack(tube):
+    return [ColorBox(COLORS[c], count=n) for c, n in runs(tube)]
+
+
+def runs(tube):
+    result = []
+    for c in tube:
+        if result and result[-1][0] == c:
+            result[-1][1] += 1
+        else:
+            result.append([c, 1])
+
+    return [(c, n) for c, n in result]
+
+
+def top_run(tube):
+    if not tube:
+        return None, 0
+
+    color = tube[-1]
+    start = len(tube) - 1
+    while start > 0 and tube[start - 1] == color:
+        start -= 1
+
+    return color, len(tube) - start
+
+
+def is_full(tube):
+    return len(tube) >= MAX_SIZE
+
+
+def tube_solved(tube):
+    if not tube:
+        return True
+
+    return len(tube) == MAX_SIZE and tube.count(tube[0]) == MAX_SIZE
+
+
+def make_solved(capacity):
+    """
+    Builds the goal test for tubes holding `capacity` units: every tube is
+    empty or full of a single color.
+    """
+    def solved(state):
+        for t in state:
+            if t and (len(t) != capacity or t.count(t[0]) != capacity):
+                return False
+
+        return True
+
+    return solved
+
+
+solved = make_solved(MAX_SIZE)
+
+
+def sorted_solved(state):
+    """
+    Goal test that doesn't need full tubes: every tube holds a single color
+    and no color is split across tubes.
+    """
+    seen = set()
+    for t in state:
+        if not t:
+            continue
+
+        if t.count(t[0]) != len(t) or t[0] in seen:
+            return False
+
+        seen.add(t[0])
+
+    return True
+
+
+def can_pour(state, src, dst):
+    s = state[src]
+    d = state[dst]
+    if not s or src == dst:
+        return False
+
+    if not d:
+        return True
+
+    if d[-1] != s[-1]:
+        return False
+
+    _, count = top_run(s)
+    return len(d) + count <= MAX_SIZE
+
+
+def pour(state, src, dst):
+    s = state[src]
+    _, count = top_run(s)
+    new = list(state)
+    new[src] = s[:-count]
+    new[dst] = state[dst] + s[-count:]
+    return tuple(new)
+
+
+def pour_unit(state, src, dst):
+    # Pour a single unit, for games that don't move the whole run at once
+    s = state[src]
+    new = list(state)
+    new[src] = s[:-1]
+    new[dst] = state[dst] + s[-1:]
+    return tuple(new)
+
+
+def make_moves(capacity, unit=False):
+    """
+    Builds the move generator for tubes holding `capacity` units, pouring the
+    whole top run, or a single unit with `unit`. The returned
+    moves(state, order=None) yields every (src, dst) pour in the order the
+    recursive solver tries them, going through the tubes in `order` (a
+    sequence of indices) if given.
+    """
+    if unit:
+        def moves(state, order=None):
+            if order is None:
+                order = range(len(state))
+
+            for src in order:
+                s = state[src]
+                if not s:
+                    continue
+
+                for dst in order:
+                    if dst == src:
+                        continue
+
+                    d = state[dst]
+                    # Moving the only unit into an empty tube just swaps the tubes
+                    if not d and len(s) == 1:
+                        continue
+
+                    if not d or (d[-1] == s[-1] and len(d) < capacity):
+                        yield src, dst
+
+        return moves
+
+    def moves(state, order=None):
+        if order is None:
+            order = range(len(state))
+
+        for src in order:
+            s = state[src]
+            if not s:
+                continue
+
+            _, count = top_run(s)
+            for dst in order:
+                if dst == src:
+                    continue
+
+                d = state[dst]
+                # No point in moving into an empty tube if it will leave the current tube empty
+                if not d and count == len(s):
+                    continue
+
+                if not d or (d[-1] == s[-1] and len(d) + count <= capacity):
+                    yield src, dst
+
+    return moves
+
+
+moves = make_moves(MAX_SIZE)
+
+
+def empty_last(state, order=None):
+    """
+    Returns `order` (all tubes by default) with the empty tubes moved to the
+    end, the way Puzzle() orders the tubes it is given.
+    """
+    if order is None:
+        order = range(len(state))
+
+    return tuple(i for i in order if state[i]) + tuple(i for i in order if not state[i])
+
+
+def canonical(state):
+    # Tube order doesn't matter, only which tubes exist
+    return tuple(sorted(state))
+
+
+def lower_bound(state):
+    """
+    Admissible estimate of the pours left: a pour moves one run of one color,
+    so a color spread over k tubes needs at least k - 1 more pours.
+    """
+    tubes_per_color = {}
+    for t in state:
+        for c in set(t):
+            tubes_per_color[c] = tubes_per_color.get(c, 0) + 1
+
+    return sum(n - 1 for n in tubes_per_color.values())
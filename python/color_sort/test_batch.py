@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from batch import main, read_checkpoint, read_levels, solve_batch, solve_level
+
+
+THREE = [
+    ['purple', 'red', 'orange', 'purple'],
+    ['purple', 'red', 'orange', 'orange'],
+    ['red', 'orange', 'purple', 'red'],
+    [],
+    [],
+]
+
+
+class BatchTest(unittest.TestCase):
+
+    def write(self, suffix, text):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_read_levels_jsonl(self):
+        path = self.write('.jsonl', json.dumps({'id': 'a', 'tubes': THREE}) + '\n\n' + json.dumps({'tubes': [[]]}) + '\n')
+        levels = list(read_levels(path))
+        self.assertEqual(levels, [('a', THREE, {}), ('2', [[]], {})])
+
+    def test_read_levels_rules(self):
+        path = self.write('.jsonl', json.dumps({'id': 'a', 'tubes': [['RE'], []], 'capacity': 1, 'pour': 'unit'}))
+        self.assertEqual(list(read_levels(path)), [('a', [['RE'], []], {'capacity': 1, 'pour': 'unit'})])
+
+    def test_read_levels_errors(self):
+        path = self.write('.jsonl', '\n'.join([
+            json.dumps({'id': 'a', 'tubes': THREE}),
+            '{"id": "b", "tubes": [',
+            json.dumps({'id': 'c'}),
+            json.dumps([['RE']]),
+            json.dumps({'id': 'd', 'tubes': [[]]}),
+        ]))
+        levels = list(read_levels(path))
+        self.assertEqual(levels[0], ('a', THREE, {}))
+        self.assertEqual([r['id'] for r in levels[1:4]], ['1', 'c', '3'])
+        self.assertTrue(all('error' in r for r in levels[1:4]))
+        self.assertEqual(levels[4], ('d', [[]], {}))
+
+    def test_read_levels_csv(self):
+        path = self.write('.csv', 'c1,RE,RE RE RE,\n')
+        self.assertEqual(list(read_levels(path)), [('c1', [['RE'], ['RE', 'RE', 'RE'], []], {})])
+
+    def test_read_checkpoint(self):
+        self.assertEqual(read_checkpoint(None), set())
+        path = self.write('.txt', 'a\nb\n')
+        self.assertEqual(read_checkpoint(path), {'a', 'b'})
+
+    def test_solve_level(self):
+        for solver in ('astar', 'dfs', 'optimal'):
+            record = solve_level('a', THREE, solver)
+            self.assertTrue(record['solved'], solver)
+            self.assertEqual(record['pours'], len(record['path']))
+
+        self.assertEqual(solve_level('o', THREE, 'optimal')['pours'], 10)
+
+    def test_solve_level_rules(self):
+        tubes = [['RE', 'BL', 'RE'], ['BL', 'RE', 'BL'], []]
+        record = solve_level('a', tubes, 'optimal', rules={'capacity': 3, 'pour': 'unit'})
+        self.assertTrue(record['solved'])
+
+    def test_solve_level_error(self):
+        record = solve_level('bad', [['RE']])
+        self.assertIn('error', record)
+        self.assertNotIn('solved', record)
+
+    def test_solve_batch(self):
+        levels = [('a', THREE, {}), ('b', [['RE'], ['RE', 'RE', 'RE'], []], {}), ('c', THREE, {})]
+        records = list(solve_batch(levels, workers=2, timeout=10, done={'c'}))
+        self.assertEqual(sorted(r['id'] for r in records), ['a', 'b'])
+        self.assertTrue(all(r['solved'] for r in records))
+
+    def test_solve_batch_errors(self):
+        levels = [('a', THREE, {}), {'id': 'b', 'error': "level has no 'tubes'"}]
+        records = {r['id']: r for r in solve_batch(levels, workers=2)}
+        self.assertTrue(records['a']['solved'])
+        self.assertEqual(records['b'], levels[1])
+
+    def test_checkpoint(self):
+        path = self.write('.jsonl', '\n'.join([
+            json.dumps({'id': 'solved', 'tubes': THREE}),
+            json.dumps({'id': 'unsolvable', 'tubes': [['RE', 'BL'], ['BL', 'RE']], 'capacity': 2}),
+            json.dumps({'id': 'bad color', 'tubes': [['XX'], []]}),
+            json.dumps({'id': 'no tubes'}),
+            'not json',
+        ]))
+        checkpoint = self.write('.txt', '')
+        out = io.StringIO()
+        with redirect_stdout(out), redirect_stderr(io.StringIO()):
+            main([path, '--workers', '2', '--checkpoint', checkpoint])
+
+        records = {r['id']: r for r in map(json.loads, out.getvalue().splitlines())}
+        self.assertEqual(sorted(records), ['4', 'bad color', 'no tubes', 'solved', 'unsolvable'])
+        self.assertFalse(records['unsolvable']['solved'])
+        # Only levels with an answer are skipped next time
+        self.assertEqual(read_checkpoint(checkpoint), {'solved', 'unsolvable'})
+
+
+if __name__ == '__main__':
+    unittest.main()
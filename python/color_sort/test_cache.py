@@ -0,0 +1,47 @@
+import unittest
+
+from cache import StateCache
+
+
+class StateCacheTest(unittest.TestCase):
+
+    def test_seen(self):
+        c = StateCache()
+        self.assertFalse(c.seen('a', 5))
+        self.assertTrue(c.seen('a', 5))
+        self.assertTrue(c.seen('a', 3))
+        self.assertEqual(c.hits, 2)
+        self.assertEqual(c.misses, 1)
+
+    def test_seen_deeper(self):
+        c = StateCache()
+        self.assertFalse(c.seen('a', 3))
+        # More moves left than last time, so it needs searching again
+        self.assertFalse(c.seen('a', 5))
+        self.assertTrue(c.seen('a', 4))
+        self.assertEqual(len(c), 1)
+
+    def test_lru_eviction(self):
+        c = StateCache(max_entries=2)
+        c.seen('a')
+        c.seen('b')
+        # Touch 'a' so 'b' is the least recently used
+        c.seen('a')
+        c.seen('c')
+        self.assertEqual(len(c), 2)
+        self.assertIn('a', c)
+        self.assertIn('c', c)
+        self.assertNotIn('b', c)
+
+    def test_clear(self):
+        c = StateCache()
+        c.seen('a')
+        c.seen('a')
+        c.clear()
+        self.assertEqual(len(c), 0)
+        self.assertEqual(c.hits, 0)
+        self.assertEqual(c.misses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import sys
+import unittest
+
+from cache import StateCache
+from color import Color
+from engine import SearchEngine, solve_iterative
+from puzzle import Puzzle, solve
+from tube import Tube
+
+
+def seven_full_colors():
+    return Puzzle([
+        Tube([Color.purple, Color.teal, Color.purple, Color.pink], tid=1),
+        Tube([Color.red, Color.pink, Color.grey, Color.orange], tid=2),
+        Tube([Color.teal, Color.light_blue, Color.light_blue, Color.purple], tid=3),
+        Tube([Color.teal, Color.orange, Color.orange, Color.pink], tid=4),
+        Tube([Color.red, Color.teal, Color.grey, Color.grey], tid=5),
+        Tube([Color.light_blue, Color.light_blue, Color.red, Color.purple], tid=6),
+        Tube([Color.grey, Color.orange, Color.pink, Color.red], tid=7),
+        Tube(tid=8),
+        Tube(tid=9),
+    ])
+
+
+class SearchEngineTest(unittest.TestCase):
+
+    def test_same_path_as_solve(self):
+        s, z, t = solve(seven_full_colors(), 25, [])
+        es, ez, et = solve_iterative(seven_full_colors(), 25)
+        self.assertTrue(es)
+        self.assertTrue(ez.solved())
+        self.assertEqual(et, t)
+
+    def test_same_path_as_solve_with_cache(self):
+        s, z, t = solve(seven_full_colors(), 25, [], StateCache())
+        es, ez, et = solve_iterative(seven_full_colors(), 25, StateCache())
+        self.assertEqual(et, t)
+
+    def test_unsolvable(self):
+        p = Puzzle([
+            Tube([Color.red, Color.blue, Color.red, Color.blue]),
+            Tube([Color.blue, Color.red, Color.blue, Color.red]),
+        ])
+        s, z, t = solve_iterative(p, 10)
+        self.assertFalse(s)
+
+    def test_deeper_than_recursion_limit(self):
+        count = sys.getrecursionlimit() * 2
+        s, z, t = solve_iterative(seven_full_colors(), count, StateCache())
+        self.assertTrue(s)
+
+    def test_pause_resume(self):
+        s, z, t = solve(seven_full_colors(), 25, [])
+
+        engine = SearchEngine(seven_full_colors(), 25)
+        self.assertIsNone(engine.run(max_nodes=10))
+        self.assertEqual(engine.nodes, 10)
+
+        pauses = 1
+        while True:
+            # Round trip the paused search through JSON
+            engine = SearchEngine.load(json.loads(json.dumps(engine.dump())))
+            solved = engine.run(max_nodes=10)
+            if solved is not None:
+                break
+            pauses += 1
+
+        self.assertTrue(solved)
+        self.assertGreater(pauses, 1)
+        self.assertEqual(engine.result()[2], t)
+
+
+if __name__ == '__main__':
+    unittest.main()
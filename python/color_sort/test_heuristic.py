@@ -0,0 +1,48 @@
+import unittest
+
+from color import Color
+import heuristic
+import state
+
+
+R = state.INDEX[Color.red]
+B = state.INDEX[Color.blue]
+G = state.INDEX[Color.green]
+
+
+class HeuristicTest(unittest.TestCase):
+
+    def test_get(self):
+        self.assertIs(heuristic.get('runs'), heuristic.runs)
+        with self.assertRaises(KeyError):
+            heuristic.get('nope')
+
+    def test_register(self):
+        @heuristic.register('test-one')
+        def one(the_state):
+            return 1
+
+        try:
+            self.assertIs(heuristic.get('test-one'), one)
+        finally:
+            del heuristic.HEURISTICS['test-one']
+
+    def test_solved_is_zero(self):
+        s = (bytes([R] * 4), bytes([B] * 4), state.EMPTY)
+        for name, h in heuristic.HEURISTICS.items():
+            self.assertEqual(h(s), 0, name)
+
+    def test_breaks(self):
+        s = (bytes([R, B, B, R]), bytes([G, R]), state.EMPTY)
+        self.assertEqual(heuristic.breaks(s), 3)
+
+    def test_runs(self):
+        s = (bytes([R, B, B, R]), bytes([G, R]), state.EMPTY)
+        # red is in 3 runs, blue and green in 1
+        self.assertEqual(heuristic.runs(s), 2)
+        self.assertEqual(heuristic.spread(s), 1)
+        self.assertEqual(heuristic.most(s), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from color import Color
+from movegen import MoveGenerator, score
+import state
+
+
+R = state.INDEX[Color.red]
+B = state.INDEX[Color.blue]
+G = state.INDEX[Color.green]
+
+
+class MoveGeneratorTest(unittest.TestCase):
+
+    def test_empty(self):
+        m = MoveGenerator(order=False)
+        s = (bytes([B, R]), state.EMPTY, state.EMPTY)
+        self.assertEqual(m.moves(s), [(0, 1)])
+        self.assertEqual(m.pruned['empty'], 1)
+
+    def test_identical(self):
+        m = MoveGenerator(order=False)
+        s = (bytes([B, R]), bytes([B, R]), bytes([G, R]))
+        moves = m.moves(s)
+        self.assertNotIn((1, 0), moves)
+        self.assertNotIn((1, 2), moves)
+        self.assertNotIn((2, 1), moves)
+        self.assertIn((0, 1), moves)
+        self.assertIn((2, 0), moves)
+        self.assertEqual(m.pruned['identical'], 3)
+
+    def test_single_run(self):
+        m = MoveGenerator(order=False)
+        s = (bytes([R]), bytes([R, R]))
+        self.assertEqual(m.moves(s), [(0, 1)])
+        self.assertEqual(m.pruned['single-run'], 1)
+
+    def test_reverse(self):
+        m = MoveGenerator(order=False)
+        s = (bytes([B, R]), bytes([G, R]), state.EMPTY)
+        moves = m.moves(s, last=(0, 1))
+        self.assertNotIn((1, 0), moves)
+        self.assertIn((0, 1), moves)
+        self.assertEqual(m.pruned['reverse'], 1)
+
+    def test_order(self):
+        m = MoveGenerator()
+        s = (bytes([B, R]), bytes([G, R, R]), state.EMPTY)
+        moves = m.moves(s)
+        # Merging onto red goes before pouring into the empty tube
+        self.assertEqual(moves[0], (0, 1))
+        self.assertGreater(score(s, 0, 1), score(s, 0, 2))
+        self.assertEqual(m.total(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+
+from color import Color
+import parallel
+from parallel import solve_parallel, split
+from puzzle import Puzzle
+from tube import Tube
+import state
+
+
+def three_full_colors():
+    return Puzzle([
+        Tube([Color.purple, Color.red, Color.orange, Color.purple], tid=1),
+        Tube([Color.purple, Color.red, Color.orange, Color.orange], tid=2),
+        Tube([Color.red, Color.orange, Color.purple, Color.red], tid=3),
+        Tube(tid=4),
+        Tube(tid=5),
+    ])
+
+
+class ParallelTest(unittest.TestCase):
+
+    def test_split(self):
+        s = three_full_colors().state()
+        one = split(s, 1, 50)
+        self.assertEqual([m for m, _ in one], [[m] for m in state.moves(s)])
+
+        two = split(s, 2, 50)
+        self.assertTrue(all(len(m) == 2 for m, _ in two))
+        self.assertEqual(split(s, 2, 1), one)
+
+    def test_solve_parallel(self):
+        p = three_full_colors()
+        s, z, t = solve_parallel(p, workers=2, count=11)
+        self.assertTrue(s)
+        self.assertTrue(z.solved())
+        self.assertEqual(z.tids(), p.tids())
+
+        tubes = {tube.tid: tube for tube in p.copy().tubes}
+        for src, dst in t:
+            tubes[dst].push(tubes[src].pop())
+        self.assertTrue(all(tube.solved() for tube in tubes.values()))
+
+    def test_solve_parallel_solved(self):
+        p = Puzzle([Tube.fill_with(Color.red), Tube()])
+        self.assertEqual(solve_parallel(p, workers=2), (True, p, []))
+
+    def test_solve_parallel_unsolvable(self):
+        p = Puzzle([
+            Tube([Color.red, Color.blue, Color.red, Color.blue]),
+            Tube([Color.blue, Color.red, Color.blue, Color.red]),
+        ])
+        s, z, t = solve_parallel(p, workers=2)
+        self.assertFalse(s)
+
+    def test_found_checked_every_few_nodes(self):
+        p = three_full_colors()
+        event = mock.Mock()
+        event.is_set.return_value = False
+        with mock.patch.object(parallel, 'FOUND_CHECK', 4):
+            parallel.init_worker(event)
+            self.assertIsNotNone(parallel.solve_branch(p.state(), 50, p.rules))
+            self.assertGreater(parallel.nodes, 4)
+            self.assertEqual(event.is_set.call_count, parallel.nodes // 4)
+
+            # Once it is seen set, the whole branch gives up
+            event.is_set.return_value = True
+            parallel.init_worker(event)
+            self.assertIsNone(parallel.solve_branch(p.state(), 50, p.rules))
+            self.assertTrue(parallel.stopped)
+            self.assertEqual(parallel.nodes, 4)
+
+        parallel.init_worker(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,32 @@
 import unittest
 
+from cache import StateCache
 from color import Color
-from puzzle import Puzzle, solve
+from puzzle import Puzzle, solve, solve_astar, solve_ida, solve_optimal
+import heuristic
+from movegen import MoveGenerator
 from tube import Tube
 
+def three_full_colors():
+    return Puzzle([
+        Tube([Color.purple, Color.red, Color.orange, Color.purple], tid=1),
+        Tube([Color.purple, Color.red, Color.orange, Color.orange], tid=2),
+        Tube([Color.red, Color.orange, Color.purple, Color.red], tid=3),
+        Tube(tid=4),
+        Tube(tid=5),
+    ])
+
+
+def replay(puzzle, path):
+    tubes = {t.tid: t for t in puzzle.copy().tubes}
+    for src, dst in path:
+        color = tubes[src].pop()
+        assert tubes[dst].fits(color)
+        tubes[dst].push(color)
+
+    return all(t.solved() for t in tubes.values())
+
+
 class PuzzleTest(unittest.TestCase):
 
     def test_solved_empty(self):
@@ -60,6 +83,31 @@ class PuzzleTest(unittest.TestCase):
         p.pop()
         self.assertEqual(len(p.tubes), len(c.tubes) - 1)
 
+    def test_key_ignores_order_and_tid(self):
+        p1 = Puzzle([
+            Tube([Color.red, Color.blue, Color.blue, Color.red], tid=1),
+            Tube([Color.blue, Color.red, Color.red, Color.blue], tid=2),
+            Tube(tid=3),
+        ])
+        p2 = Puzzle([
+            Tube([Color.blue, Color.red, Color.red, Color.blue], tid=7),
+            Tube(tid=8),
+            Tube([Color.red, Color.blue, Color.blue, Color.red], tid=9),
+        ])
+        self.assertEqual(p1.key(), p2.key())
+
+        p2.tubes[0].pop()
+        self.assertNotEqual(p1.key(), p2.key())
+
+    def test_state_round_trip(self):
+        p = Puzzle([
+            Tube([Color.red, Color.blue, Color.blue, Color.red], tid=1),
+            Tube([Color.blue, Color.red, Color.red, Color.blue], tid=2),
+            Tube(tid=3),
+        ])
+        c = Puzzle.from_state(p.state(), p.tids())
+        self.assertEqual(c.tubes, p.tubes)
+
     def test_solve_super_simple(self):
         tubes = [
             Tube([Color.red]),
@@ -131,6 +179,98 @@ class PuzzleTest(unittest.TestCase):
         s, z, t = solve(p, 25, [])
         self.assertTrue(s)
 
+    def test_solve_with_cache(self):
+        tubes = [
+            Tube([Color.purple, Color.red, Color.orange, Color.purple]),
+            Tube([Color.purple, Color.red, Color.orange, Color.orange]),
+            Tube([Color.red, Color.orange, Color.purple, Color.red]),
+            Tube(),
+            Tube(),
+        ]
+        p = Puzzle(tubes)
+        cache = StateCache()
+        s, z, t = solve(p, 11, [], cache)
+        self.assertTrue(s)
+        self.assertTrue(z.solved())
+        self.assertGreater(cache.misses, 0)
+
+    def test_solve_optimal_already_solved(self):
+        p = Puzzle([Tube.fill_with(Color.red), Tube()])
+        s, z, t = solve_optimal(p)
+        self.assertTrue(s)
+        self.assertEqual(t, [])
+
+    def test_solve_optimal(self):
+        p = three_full_colors()
+        s, z, t = solve_optimal(p)
+        self.assertTrue(s)
+        self.assertTrue(z.solved())
+        self.assertTrue(replay(p, t))
+
+        # Never longer than the depth first solution
+        ds, dz, dt = solve(three_full_colors(), 11, [])
+        self.assertLessEqual(len(t), len(dt))
+
+    def test_solve_optimal_unsolvable(self):
+        p = Puzzle([
+            Tube([Color.red, Color.blue, Color.red, Color.blue]),
+            Tube([Color.blue, Color.red, Color.blue, Color.red]),
+        ])
+        s, z, t = solve_optimal(p)
+        self.assertFalse(s)
+
+    def test_solve_ida_matches_optimal(self):
+        s, z, t = solve_optimal(three_full_colors())
+        ids, idz, idt = solve_ida(three_full_colors())
+        self.assertTrue(ids)
+        self.assertEqual(len(idt), len(t))
+        self.assertTrue(replay(three_full_colors(), idt))
+
+    def test_solve_optimal_memory_budget(self):
+        s, z, t = solve_optimal(three_full_colors())
+        bs, bz, bt = solve_optimal(three_full_colors(), max_frontier=2)
+        self.assertTrue(bs)
+        self.assertEqual(len(bt), len(t))
+        self.assertTrue(replay(three_full_colors(), bt))
+
+    def test_solve_astar_is_shortest(self):
+        s, z, t = solve_optimal(three_full_colors())
+        for name in heuristic.HEURISTICS:
+            hs, hz, ht = solve_astar(three_full_colors(), name)
+            self.assertTrue(hs, name)
+            self.assertEqual(len(ht), len(t), name)
+            self.assertTrue(replay(three_full_colors(), ht), name)
+
+    def test_solve_astar_weighted(self):
+        s, z, t = solve_astar(three_full_colors(), 'breaks', weight=3)
+        self.assertTrue(s)
+        self.assertTrue(z.solved())
+        self.assertTrue(replay(three_full_colors(), t))
+
+    def test_solve_astar_unsolvable(self):
+        p = Puzzle([
+            Tube([Color.red, Color.blue, Color.red, Color.blue]),
+            Tube([Color.blue, Color.red, Color.blue, Color.red]),
+        ])
+        s, z, t = solve_astar(p)
+        self.assertFalse(s)
+
+    def test_solve_pruned(self):
+        m = MoveGenerator()
+        s, z, t = solve(three_full_colors(), 11, [], movegen=m)
+        self.assertTrue(s)
+        self.assertTrue(z.solved())
+        self.assertTrue(replay(three_full_colors(), t))
+
+    def test_solve_astar_pruned(self):
+        s, z, t = solve_optimal(three_full_colors())
+        m = MoveGenerator(order=False)
+        ps, pz, pt = solve_astar(three_full_colors(), movegen=m)
+        self.assertTrue(ps)
+        self.assertEqual(len(pt), len(t))
+        self.assertTrue(replay(three_full_colors(), pt))
+        self.assertGreater(m.total(), 0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,104 @@
+import pickle
+import unittest
+
+from color import Color
+from engine import solve_iterative
+from movegen import MoveGenerator
+from puzzle import Puzzle, solve, solve_astar, solve_optimal
+from rules import STANDARD, Rules
+from tube import Tube
+import state
+
+
+R = state.INDEX[Color.red]
+B = state.INDEX[Color.blue]
+
+
+def capacity_five():
+    rules = Rules(capacity=5)
+    return Puzzle([
+        Tube([Color.red, Color.blue, Color.red, Color.blue, Color.red], tid=1),
+        Tube([Color.blue, Color.red, Color.blue, Color.red, Color.blue], tid=2),
+        Tube(tid=3),
+        Tube(tid=4),
+    ], rules=rules)
+
+
+class RulesTest(unittest.TestCase):
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Rules(capacity=0)
+        with self.assertRaises(ValueError):
+            Rules(pour='some')
+        with self.assertRaises(ValueError):
+            Rules(goal='done')
+
+    def test_standard(self):
+        self.assertEqual(STANDARD, Rules())
+        self.assertIs(STANDARD.moves, state.moves)
+        self.assertIs(STANDARD.solved, state.solved)
+
+    def test_pickle(self):
+        r = Rules(capacity=6, pour='unit', goal='sorted')
+        self.assertEqual(pickle.loads(pickle.dumps(r)), r)
+
+    def test_capacity_moves(self):
+        r = Rules(capacity=5)
+        s = (bytes([B, R, R]), bytes([R, R, R]))
+        self.assertEqual(list(r.moves(s)), [(0, 1)])
+        self.assertEqual(list(STANDARD.moves(s)), [])
+
+    def test_unit_moves(self):
+        r = Rules(pour='unit')
+        s = (bytes([B, R, R]), bytes([R, R, R]))
+        self.assertEqual(list(r.moves(s)), [(0, 1), (1, 0)])
+        self.assertEqual(r.pour(s, 0, 1), (bytes([B, R]), bytes([R] * 4)))
+
+    def test_sorted_goal(self):
+        r = Rules(goal='sorted')
+        self.assertTrue(r.solved((bytes([R, R]), bytes([B]), state.EMPTY)))
+        self.assertFalse(r.solved((bytes([R]), bytes([R]))))
+        self.assertFalse(r.solved((bytes([R, B]),)))
+
+    def test_puzzle_capacity(self):
+        p = capacity_five()
+        self.assertTrue(all(t.capacity == 5 for t in p.tubes))
+        self.assertFalse(p.solved())
+
+        with self.assertRaises(Exception):
+            Puzzle([Tube.fill_with(Color.red)], rules=Rules(capacity=5))
+
+    def test_solvers(self):
+        s, z, t = solve_optimal(capacity_five())
+        self.assertTrue(s)
+        self.assertTrue(z.solved())
+        self.assertEqual(z.rules, capacity_five().rules)
+
+        for solver in (
+            lambda p: solve(p, 20, []),
+            lambda p: solve(p, 20, [], movegen=MoveGenerator(rules=p.rules)),
+            lambda p: solve_astar(p),
+            lambda p: solve_iterative(p, 20),
+        ):
+            ss, sz, st = solver(capacity_five())
+            self.assertTrue(ss)
+            self.assertTrue(sz.solved())
+            self.assertGreaterEqual(len(st), len(t))
+
+    def test_unit_pours(self):
+        rules = Rules(capacity=3, pour='unit')
+        p = Puzzle([
+            Tube([Color.red, Color.blue, Color.red], tid=1, capacity=3),
+            Tube([Color.blue, Color.red, Color.blue], tid=2, capacity=3),
+            Tube(tid=3, capacity=3),
+        ], rules=rules)
+        s, z, t = solve_optimal(p)
+        self.assertTrue(s)
+        ds, dz, dt = solve(p.copy(), 30, [])
+        self.assertTrue(ds)
+        self.assertTrue(dz.solved())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from color import Color, ColorBox
+import state
+
+
+R = state.INDEX[Color.red]
+B = state.INDEX[Color.blue]
+
+
+class StateTest(unittest.TestCase):
+
+    def test_pack_unpack(self):
+        t = state.pack([Color.red, Color.blue, Color.blue])
+        self.assertEqual(t, bytes([B, B, R]))
+        self.assertEqual(state.unpack(t), [ColorBox(Color.blue, 2), ColorBox(Color.red)])
+        self.assertEqual(state.pack_boxes(state.unpack(t)), t)
+
+    def test_top_run(self):
+        self.assertEqual(state.top_run(state.EMPTY), (None, 0))
+        self.assertEqual(state.top_run(bytes([B, R, R])), (R, 2))
+        self.assertEqual(state.top_run(bytes([R, R, R, R])), (R, 4))
+
+    def test_tube_solved(self):
+        self.assertTrue(state.tube_solved(state.EMPTY))
+        self.assertTrue(state.tube_solved(bytes([R] * 4)))
+        self.assertFalse(state.tube_solved(bytes([R] * 3)))
+        self.assertFalse(state.tube_solved(bytes([R, R, R, B])))
+
+    def test_pour_is_pure(self):
+        s = (bytes([B, R, R]), bytes([R]), state.EMPTY)
+        self.assertTrue(state.can_pour(s, 0, 1))
+        n = state.pour(s, 0, 1)
+        self.assertEqual(n, (bytes([B]), bytes([R, R, R]), state.EMPTY))
+        self.assertEqual(s, (bytes([B, R, R]), bytes([R]), state.EMPTY))
+
+    def test_can_pour(self):
+        s = (bytes([B, R, R]), bytes([R, R, R]), bytes([B]), state.EMPTY)
+        # Whole run doesn't fit
+        self.assertFalse(state.can_pour(s, 0, 1))
+        # Wrong color
+        self.assertFalse(state.can_pour(s, 0, 2))
+        self.assertTrue(state.can_pour(s, 0, 3))
+        self.assertFalse(state.can_pour(s, 3, 0))
+
+    def test_moves(self):
+        s = (bytes([R, R, R]), bytes([R]), state.EMPTY)
+        # Never empties a tube into an empty tube
+        self.assertEqual(list(state.moves(s)), [(0, 1), (1, 0)])
+
+    def test_moves_order(self):
+        s = (bytes([R]), bytes([B, R]), state.EMPTY)
+        self.assertEqual(list(state.moves(s)), [(0, 1), (1, 0), (1, 2)])
+        self.assertEqual(list(state.moves(s, (1, 2, 0))), [(1, 2), (1, 0), (0, 1)])
+
+    def test_empty_last(self):
+        s = (state.EMPTY, bytes([R]), state.EMPTY, bytes([B]))
+        self.assertEqual(state.empty_last(s), (1, 3, 0, 2))
+        self.assertEqual(state.empty_last(s, (2, 3, 0, 1)), (3, 1, 2, 0))
+
+    def test_canonical(self):
+        a = (bytes([R]), state.EMPTY, bytes([B]))
+        b = (bytes([B]), bytes([R]), state.EMPTY)
+        self.assertEqual(state.canonical(a), state.canonical(b))
+
+
+if __name__ == '__main__':
+    unittest.main()
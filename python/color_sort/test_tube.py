@@ -104,6 +104,57 @@ class TubeTest(unittest.TestCase):
 
         self.assertEqual(t.size(), 4)
 
+    def test_colors(self):
+        t = Tube([Color.red, Color.blue, Color.blue])
+        self.assertEqual(t.colors, [ColorBox(Color.blue, 2), ColorBox(Color.red)])
+
+        t.colors = [ColorBox(Color.green, 3)]
+        self.assertEqual(t.size(), 3)
+        self.assertEqual(t.peek(), ColorBox(Color.green, 3))
+
+    def test_copy(self):
+        t1 = Tube([Color.red, Color.blue], tid=5)
+        t2 = t1.copy()
+        self.assertEqual(t1, t2)
+
+        t2.pop()
+        self.assertNotEqual(t1, t2)
+        self.assertEqual(t1.size(), 2)
+
+    def test_tracking(self):
+        t = Tube([Color.red, Color.blue, Color.blue])
+        t.push(Color.red)
+        self.assertEqual(t.size(), 4)
+        self.assertEqual(t.peek(), ColorBox(Color.red, 2))
+        self.assertFalse(t.solved())
+
+        t.pop()
+        t.pop()
+        self.assertTrue(t.is_empty())
+        self.assertTrue(t.solved())
+
+        t.push(ColorBox(Color.green, 3))
+        self.assertFalse(t.solved())
+        self.assertTrue(t.fits(Color.green))
+        self.assertFalse(t.fits(ColorBox(Color.green, 2)))
+
+        t.push(Color.green)
+        self.assertTrue(t.solved())
+        self.assertTrue(t.is_full())
+
+        # Assigning the packed contents resets the tracked values
+        t.units = t.copy().units[:1]
+        self.assertEqual(t.size(), 1)
+        self.assertEqual(t.peek(), ColorBox(Color.green))
+        self.assertFalse(t.solved())
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Tube().other = 1
+
+        with self.assertRaises(AttributeError):
+            ColorBox(Color.red).other = 1
+
     def test_equal(self):
         t1 = Tube(tid=1)
         t2 = Tube(tid=1)
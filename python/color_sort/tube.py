@@ -1,8 +1,7 @@
 from color import Color, ColorBox
+from state import MAX_SIZE
 import itertools
-
-
-MAX_SIZE = 4
+import state
 
 
 gen_tid = itertools.count()
@@ -16,106 +15,126 @@ class EmptyException(Exception):
 
 
 class Tube:
-    def __init__(self, colors=[], tid=0):
-        self.colors = []
+    # The fill level, top run and solved flag are kept up to date as the tube
+    # changes, so the solver's inner loop never has to scan the contents
+    __slots__ = ('tid', '_capacity', '_units', '_size', '_top', '_run', '_solved')
+
+    def __init__(self, colors=[], tid=0, capacity=MAX_SIZE):
         if tid == 0:
             tid = next(gen_tid)
 
         self.tid = tid
-
-        if len(colors) > 0:
-            last_color = ColorBox(colors[0])
-            for c in colors[1:]:
-                if last_color.color == c:
-                    last_color.count += 1
-                else:
-                    self.colors.insert(0, last_color)
-                    last_color = ColorBox(c)
-
-            self.colors.insert(0, last_color)
+        self._capacity = capacity
+        # Packed contents, see state.py
+        self.units = state.pack(colors) if colors else state.EMPTY
 
     def __eq__(self, other):
-        return self.colors == other.colors and self.tid == other.tid
+        return self._units == other._units and self.tid == other.tid
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, capacity):
+        self._capacity = capacity
+        self.units = self._units
+
+    @property
+    def units(self):
+        return self._units
+
+    @units.setter
+    def units(self, units):
+        self._units = units
+        self._size = len(units)
+        c, n = state.top_run(units)
+        self._top = state.COLORS[c] if n else None
+        self._run = n
+        self._solved = n == 0 or n == self._capacity
+
+    @property
+    def colors(self):
+        return state.unpack(self._units)
+
+    @colors.setter
+    def colors(self, boxes):
+        self.units = state.pack_boxes(boxes)
 
     @staticmethod
-    def fill_with(color, num=4, tid=0):
-        t = Tube(tid=tid)
+    def fill_with(color, num=4, tid=0, capacity=MAX_SIZE):
+        t = Tube(tid=tid, capacity=capacity)
         for _ in range(num):
             t.push(color)
 
         return t
 
     def is_empty(self):
-        return len(self.colors) == 0
+        return self._size == 0
 
     def peek(self):
-        if self.is_empty():
+        if self._size == 0:
             raise EmptyException
 
-        return self.colors[-1]
+        return ColorBox(self._top, count=self._run)
 
     def pop(self):
-        if self.is_empty():
+        if self._size == 0:
             return
 
-        return self.colors.pop()
+        box = ColorBox(self._top, count=self._run)
+        self.units = self._units[:-self._run]
+        return box
 
     def copy(self):
-        t = Tube(tid=self.tid)
-        t.colors = self.copy_colors()
+        t = Tube(tid=self.tid, capacity=self._capacity)
+        t._units = self._units
+        t._size = self._size
+        t._top = self._top
+        t._run = self._run
+        t._solved = self._solved
         return t
 
     def copy_colors(self):
-        return [ColorBox(c.color, count=c.count) for c in self.colors]
+        return self.colors
 
     def push(self, color):
-        if self.is_full():
-            raise FullException()
-
         if isinstance(color, Color):
             color = ColorBox(color)
 
-        if self.is_empty() or self.peek().color != color.color:
-            self.colors.append(color)
-            return
-
-        if self.peek().count + color.count > MAX_SIZE:
+        if self._size + color.count > self._capacity:
             raise FullException
 
-        self.peek().count += color.count
+        self._units += bytes([state.INDEX[color.color]]) * color.count
+        self._size += color.count
+        if self._top == color.color:
+            self._run += color.count
+        else:
+            self._top = color.color
+            self._run = color.count
+
+        self._solved = self._run == self._capacity
 
     def size(self):
-        return sum([c.count for c in self.colors])
+        return self._size
 
     def is_full(self):
-        return self.size() == MAX_SIZE
+        return self._size >= self._capacity
 
     def solved(self):
-        if self.is_empty():
-            return True
-
-        if not self.is_full():
-            return False
-
-        first = self.colors[0]
-        return all([c == first for c in self.colors])
+        return self._solved
 
     def fits(self, color):
-        if self.is_full():
+        if self._size >= self._capacity:
             return False
 
-        if self.is_empty():
+        if self._size == 0:
             return True
 
         if isinstance(color, Color):
-            color = ColorBox(color)
-
-        p = self.peek()
-        if p.color == color.color:
-            if self.size() + color.count <= MAX_SIZE:
-                return True
+            return self._top == color
 
-        return False
+        return self._top == color.color and self._size + color.count <= self._capacity
 
     def dump(self):
         val = ''
@@ -124,7 +143,7 @@ class Tube:
         
         val += ' -- '
         got = len(val.split('\n'))
-        want = 6
+        want = self._capacity + 2
         prefix = ''
         for _ in range(want - got):
             prefix += '|  |\n'
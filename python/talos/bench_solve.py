@@ -0,0 +1,102 @@
+"""
+Benchmark of the backtracking solver on the stock puzzle from prep(): wall
+time and peak traced memory of one solve, with the placement tables built
+(cold) and already built (warm). Each is measured for the solver, which
+places and takes back pieces in place, and side by side for the same search
+copying the counts and the path at every placement, as it did before.
+
+    python bench_solve.py
+"""
+import time
+import timeit
+import tracemalloc
+
+import bitboard
+from cache import FailureCache
+from shapes import piece_kinds, reset_names
+from solve import branches, piece_tables, render, solve, stock_level
+
+
+NUMBER = 200
+
+
+def copy_search(filled, full, counts, tables, sizes, edges, stats, cache, path=()):
+    # iter_search() with a new list of counts and a new path per placement
+    stats['nodes'] += 1
+    if not any(counts):
+        return list(path) if filled == full else None
+
+    if cache.failed(filled, tuple(counts)):
+        return None
+
+    for idx, mask in branches(filled, full, counts, tables, sizes, edges, stats):
+        placed = copy_search(filled | mask, full, list(counts), tables, sizes, edges, stats, cache, path + ((idx, mask),))
+        if placed is not None:
+            return placed
+
+    cache.add(filled, tuple(counts))
+    return None
+
+
+def run():
+    reset_names()
+    board, shapes = stock_level()
+    num_rows = len(board)
+    num_cols = len(board[0])
+    return solve(board, set(shapes), num_rows, num_cols, 0)
+
+
+def run_copying():
+    reset_names()
+    board, shapes = stock_level()
+    num_rows = len(board)
+    num_cols = len(board[0])
+    kinds = list(piece_kinds(set(shapes)).values())
+    tables, sizes, edges = piece_tables([k[0] for k in kinds], num_rows, num_cols)
+    stats = {'nodes': 0, 'pruned': 0}
+    placed = copy_search(bitboard.board_mask(board), bitboard.full_mask(num_rows, num_cols), [len(k) for k in kinds],
+                         tables, sizes, edges, stats, FailureCache())
+    return render(board, kinds, placed)
+
+
+def peak(func):
+    tracemalloc.start()
+    func()
+    _, result = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result
+
+
+def measure(func):
+    # (cold, warm, cold peak, warm peak) of one solve
+    bitboard.PLACEMENTS.clear()
+    start = time.perf_counter()
+    func()
+    cold = time.perf_counter() - start
+
+    warm = min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER
+
+    bitboard.PLACEMENTS.clear()
+    cold_peak = peak(func)
+    warm_peak = peak(func)
+    return cold, warm, cold_peak, warm_peak
+
+
+def main():
+    if run() != run_copying():
+        raise AssertionError('the copying search found a different solution')
+
+    in_place = measure(run)
+    copying = measure(run_copying)
+
+    print('{:<6} {:>28} {:>28}'.format('', 'in place', 'copying'))
+    for name, (time_idx, peak_idx) in (('cold', (0, 2)), ('warm', (1, 3))):
+        print('{:<6} {:>8.3f} ms {:>8.1f} KB peak {:>8.3f} ms {:>8.1f} KB peak'.format(
+            name,
+            in_place[time_idx] * 1e3, in_place[peak_idx] / 1024,
+            copying[time_idx] * 1e3, copying[peak_idx] / 1024,
+        ))
+
+
+if __name__ == '__main__':
+    main()
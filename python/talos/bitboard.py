@@ -0,0 +1,225 @@
+"""
+Bitboard helpers for the talos solver.
+
+Board cells are numbered row by row, so bit `row * num_cols + col` of an int
+is set when that cell is covered. Every rotation of a shape is turned into a
+mask in the same layout once, which makes checking whether it fits a single
+AND and placing it a single OR.
+"""
+
+
+def cell_bit(row, col, num_cols):
+    return 1 << (row * num_cols + col)
+
+
+def full_mask(num_rows, num_cols):
+    return (1 << (num_rows * num_cols)) - 1
+
+
+def column_masks(num_rows, num_cols):
+    """
+    Returns the masks of the first and last column, used to stop cells
+    shifted sideways from wrapping around to the next or previous row.
+    """
+    first = 0
+    for row in range(num_rows):
+        first |= cell_bit(row, 0, num_cols)
+
+    return first, first << (num_cols - 1)
+
+
+def board_mask(board):
+    num_cols = len(board[0])
+    mask = 0
+    for row, cells in enumerate(board):
+        for col, value in enumerate(cells):
+            if value != '*':
+                mask |= cell_bit(row, col, num_cols)
+
+    return mask
+
+
+def piece_masks(board):
+    """
+    Returns the mask of every piece on a solved board, keyed by its letter.
+    """
+    num_cols = len(board[0])
+    masks = {}
+    for row, cells in enumerate(board):
+        for col, value in enumerate(cells):
+            if value not in '*#':
+                masks[value] = masks.get(value, 0) | cell_bit(row, col, num_cols)
+
+    return masks
+
+
+def symmetries(num_rows, num_cols):
+    """
+    Returns the rotations and reflections of a num_rows x num_cols board
+    other than the identity, each as a list mapping every cell to the cell it
+    moves to. Quarter turns and diagonal flips only apply to square boards.
+    """
+    last_row = num_rows - 1
+    last_col = num_cols - 1
+    moves = [
+        lambda r, c: (last_row - r, last_col - c),
+        lambda r, c: (r, last_col - c),
+        lambda r, c: (last_row - r, c),
+    ]
+    if num_rows == num_cols:
+        moves += [
+            lambda r, c: (c, last_row - r),
+            lambda r, c: (last_col - c, r),
+            lambda r, c: (c, r),
+            lambda r, c: (last_col - c, last_row - r),
+        ]
+
+    perms = []
+    for move in moves:
+        perm = []
+        for pos in range(num_rows * num_cols):
+            row, col = move(*divmod(pos, num_cols))
+            perm.append(row * num_cols + col)
+        perms.append(perm)
+
+    return perms
+
+
+def transform(mask, perm):
+    result = 0
+    while mask:
+        low = mask & -mask
+        result |= 1 << perm[low.bit_length() - 1]
+        mask ^= low
+
+    return result
+
+
+def rotation_cells(rotation):
+    """
+    Returns the (row, col) offsets of a rotation's cells from the cell it is
+    placed on, which is the first filled cell of its top row (see
+    shape_start_pos()).
+    """
+    start = 0
+    while rotation[0][start] == '*':
+        start += 1
+
+    return [
+        (row, col - start)
+        for row, cells in enumerate(rotation)
+        for col, value in enumerate(cells)
+        if value != '*'
+    ]
+
+
+def rotation_mask(rotation, num_cols):
+    """
+    Returns (mask, left, right, height) for a rotation: its cells as a mask
+    whose leftmost column is bit 0, the column offsets of its leftmost and
+    rightmost cells from the anchor, and its number of rows.
+    """
+    cells = rotation_cells(rotation)
+    left = min(col for _, col in cells)
+    right = max(col for _, col in cells)
+    height = max(row for row, _ in cells) + 1
+
+    mask = 0
+    for row, col in cells:
+        mask |= cell_bit(row, col - left, num_cols)
+
+    return mask, left, right, height
+
+
+def place(rotation, row, col, num_rows, num_cols):
+    """
+    Returns the mask of `rotation` (as built by rotation_mask()) anchored at
+    (row, col), or 0 if part of it would be off the board.
+    """
+    mask, left, right, height = rotation
+    if col + left < 0 or col + right >= num_cols or row + height > num_rows:
+        return 0
+
+    return mask << (row * num_cols + col + left)
+
+
+# (kind, num_rows, num_cols) -> placement table, see placements()
+PLACEMENTS = {}
+
+
+def placements(shape, num_rows, num_cols):
+    """
+    Returns the placement table for `shape`'s kind on a num_rows x num_cols
+    board: for every cell, the masks of the distinct rotations anchored on
+    that cell that stay on the board. Rotations covering the same cells are
+    only listed once. Tables are built once per kind and board size.
+    """
+    key = (type(shape), num_rows, num_cols)
+    if key in PLACEMENTS:
+        return PLACEMENTS[key]
+
+    rotations = []
+    for rotation in shape.rotations():
+        rotation = rotation_mask(rotation, num_cols)
+        if rotation not in rotations:
+            rotations.append(rotation)
+
+    table = []
+    for pos in range(num_rows * num_cols):
+        row, col = divmod(pos, num_cols)
+        masks = [place(r, row, col, num_rows, num_cols) for r in rotations]
+        table.append([m for m in masks if m])
+
+    PLACEMENTS[key] = table
+    return table
+
+
+def first_empty(filled, full):
+    # Index of the lowest empty cell, i.e. the first one in row major order
+    empty = full & ~filled
+    if not empty:
+        return None
+
+    return (empty & -empty).bit_length() - 1
+
+
+def count_cells(mask):
+    return bin(mask).count('1')
+
+
+def neighbours(mask, num_cols, first, last):
+    """
+    Returns the cells next to (not diagonally) any cell of `mask`, which may
+    include cells of `mask` itself and cells past the bottom of the board.
+    """
+    return (
+        ((mask << 1) & ~first)
+        | ((mask >> 1) & ~last)
+        | (mask << num_cols)
+        | (mask >> num_cols)
+    )
+
+
+def region(seed, empty, num_cols, first, last):
+    """
+    Flood fills `empty` from the `seed` cells, one ring of neighbours at a
+    time, and returns the connected empty cells reached.
+    """
+    reached = seed & empty
+    while True:
+        grown = (reached | neighbours(reached, num_cols, first, last)) & empty
+        if grown == reached:
+            return reached
+        reached = grown
+
+
+def fill(board, mask, value):
+    """
+    Writes `value` into every cell of `board` covered by `mask`.
+    """
+    num_cols = len(board[0])
+    while mask:
+        low = mask & -mask
+        row, col = divmod(low.bit_length() - 1, num_cols)
+        board[row][col] = value
+        mask ^= low
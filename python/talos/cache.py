@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+
+DEFAULT_MAX_ENTRIES = 1000000
+
+
+class FailureCache:
+    """
+    Bounded LRU set of positions known to have no solution.
+
+    A position is the (filled, counts) pair of a search: the bitboard of
+    covered cells and how many pieces of each kind are left. Any engine that
+    fills the board with the same pieces can share the cache, as long as it
+    keeps the kinds in the same order. Only add a position once every way of
+    finishing it has been tried, never when the search was cut short.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def failed(self, filled, counts):
+        """
+        Returns True if the position was already found to have no solution.
+        """
+        key = (filled, counts)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        return False
+
+    def add(self, filled, counts):
+        key = (filled, counts)
+        self._entries[key] = None
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __str__(self):
+        return 'cache: {} entries, {} hits, {} misses ({:.1%} hit rate), {} evictions'.format(
+            len(self), self.hits, self.misses, self.hit_rate(), self.evictions
+        )
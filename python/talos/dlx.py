@@ -0,0 +1,150 @@
+"""
+Exact cover (Algorithm X) solver for talos boards.
+
+Every empty cell is a column that has to be covered exactly once, and every
+way of putting a piece on the board is a row covering its cells. Pieces of
+the same kind (four Squares, say) share their rows and a count of how many
+are left, instead of each getting a column of its own, so swapping identical
+pieces doesn't produce new solutions.
+
+The sparse matrix is kept as dicts (column -> rows, row -> columns), which
+gives the same cover/uncover steps as Knuth's dancing links with plain
+Python containers. The column with the fewest rows left is always covered
+next.
+"""
+from bitboard import board_mask, fill, full_mask, placements
+from shapes import piece_kinds
+
+
+def cells(mask):
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(low.bit_length() - 1)
+        mask ^= low
+
+    return result
+
+
+def build(board, kinds, num_rows, num_cols):
+    """
+    Returns the (columns, rows) of the exact cover matrix: columns maps every
+    empty cell to the rows covering it, rows maps every (kind, mask)
+    placement to the cells it covers.
+    """
+    filled = board_mask(board)
+    empty = cells(full_mask(num_rows, num_cols) & ~filled)
+
+    columns = {pos: {} for pos in empty}
+    rows = {}
+    for kind, shapes in kinds.items():
+        table = placements(shapes[0], num_rows, num_cols)
+        for pos in empty:
+            for mask in table[pos]:
+                if mask & filled:
+                    continue
+
+                rows[(kind, mask)] = cells(mask)
+                for c in rows[(kind, mask)]:
+                    columns[c][(kind, mask)] = None
+
+    return columns, rows
+
+
+def select(columns, rows, r):
+    removed = []
+    for j in rows[r]:
+        for i in columns[j]:
+            for k in rows[i]:
+                if k != j:
+                    del columns[k][i]
+
+        removed.append(columns.pop(j))
+
+    return removed
+
+
+def deselect(columns, rows, r, removed):
+    for j in reversed(rows[r]):
+        columns[j] = removed.pop()
+        for i in columns[j]:
+            for k in rows[i]:
+                if k != j:
+                    columns[k][i] = None
+
+
+def retire(columns, rows, kind_rows):
+    # Drop every row of a kind that has no pieces left
+    removed = []
+    for r in kind_rows:
+        first = rows[r][0]
+        if first in columns and r in columns[first]:
+            for j in rows[r]:
+                del columns[j][r]
+            removed.append(r)
+
+    return removed
+
+
+def restore(columns, rows, removed):
+    for r in removed:
+        for j in rows[r]:
+            columns[j][r] = None
+
+
+def search(columns, rows, counts, kind_rows, solution):
+    if not columns:
+        if not any(counts.values()):
+            yield list(solution)
+        return
+
+    c = min(columns, key=lambda c: len(columns[c]))
+    for r in list(columns[c]):
+        kind = r[0]
+        counts[kind] -= 1
+        solution.append(r)
+        removed = select(columns, rows, r)
+        retired = retire(columns, rows, kind_rows[kind]) if not counts[kind] else []
+
+        yield from search(columns, rows, counts, kind_rows, solution)
+
+        restore(columns, rows, retired)
+        deselect(columns, rows, r, removed)
+        solution.pop()
+        counts[kind] += 1
+
+
+def render(board, kinds, chosen):
+    """
+    Returns a copy of `board` with the `chosen` placements written in. Pieces of a
+    kind get their names in the order their first cell comes on the board,
+    the same order the backtracking solver places them in.
+    """
+    board = [list(r) for r in board]
+    names = {kind: [s.name for s in shapes] for kind, shapes in kinds.items()}
+    used = {kind: 0 for kind in kinds}
+    for kind, mask in sorted(chosen, key=lambda p: p[1] & -p[1]):
+        fill(board, mask, names[kind][used[kind]])
+        used[kind] += 1
+
+    return board
+
+
+def iter_solutions(board, shapes, num_rows, num_cols):
+    """
+    Yields every tiling of `board` with all of `shapes`, as a new board.
+    """
+    kinds = piece_kinds(shapes)
+    columns, rows = build(board, kinds, num_rows, num_cols)
+    counts = {kind: len(s) for kind, s in kinds.items()}
+    kind_rows = {kind: [r for r in rows if r[0] is kind] for kind in kinds}
+
+    for chosen in search(columns, rows, counts, kind_rows, []):
+        yield render(board, kinds, chosen)
+
+
+def solve(board, shapes, num_rows, num_cols):
+    for solution in iter_solutions(board, shapes, num_rows, num_cols):
+        return solution
+
+    return False
@@ -0,0 +1,205 @@
+"""
+Reading talos levels from files.
+
+A level is a board, where '.' is a cell to fill and '#' a blocked one, and
+how many pieces of each kind there are. As JSON:
+
+    {"id": "A1", "board": ["........", "...##..."], "pieces": {"Tee": 4, "Square": 2}}
+
+or with "rows" and "cols" (and optionally "blocked": [[row, col], ...])
+instead of "board". A .json file holds one level or a list of them and a
+.jsonl file one level per line. Any other file is read as text: the board
+rows followed by a line per kind of piece, with levels separated by blank
+lines.
+
+    ........
+    ...##...
+    Tee 4
+    Square 2
+"""
+import json
+from functools import partial
+
+from shapes import (
+    LeftZed,
+    RightZed,
+    LeftEll,
+    RightEll,
+    Tee,
+    Square,
+    Rectangle,
+    reset_names
+)
+
+
+KINDS = {
+    kind.__name__: kind
+    for kind in (RightEll, LeftEll, Square, LeftZed, RightZed, Rectangle, Tee)
+}
+
+
+def check_pieces(pieces):
+    if not isinstance(pieces, dict):
+        raise ValueError('pieces must map piece names to counts, got {!r}'.format(pieces))
+    for name, count in pieces.items():
+        if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+            raise ValueError('count for {} must be a whole number, got {!r}'.format(name, count))
+
+    return pieces
+
+
+def parse_json(level):
+    """
+    Returns the (rows, pieces) of a JSON level, raising ValueError if it is
+    not one.
+    """
+    if not isinstance(level, dict):
+        raise ValueError('a level must be a JSON object, got {!r}'.format(level))
+    if 'pieces' not in level:
+        raise ValueError("level has no 'pieces'")
+
+    if 'board' in level:
+        rows = level['board']
+        if not isinstance(rows, list) or not all(isinstance(r, str) for r in rows):
+            raise ValueError("'board' must be a list of strings")
+    elif 'rows' in level and 'cols' in level:
+        num_rows = level['rows']
+        num_cols = level['cols']
+        if not all(isinstance(n, int) and n > 0 for n in (num_rows, num_cols)):
+            raise ValueError("'rows' and 'cols' must be positive whole numbers")
+
+        rows = [['.'] * num_cols for _ in range(num_rows)]
+        for cell in level.get('blocked', []):
+            if (not isinstance(cell, list) or len(cell) != 2
+                    or not all(isinstance(n, int) for n in cell)
+                    or not 0 <= cell[0] < num_rows or not 0 <= cell[1] < num_cols):
+                raise ValueError('blocked cell {!r} is not on the board'.format(cell))
+            rows[cell[0]][cell[1]] = '#'
+        rows = [''.join(r) for r in rows]
+    else:
+        raise ValueError("level needs a 'board' or 'rows' and 'cols'")
+
+    return rows, check_pieces(level['pieces'])
+
+
+def parse_json_line(line):
+    try:
+        level = json.loads(line)
+    except ValueError as e:
+        raise ValueError('not valid JSON: {}'.format(e))
+
+    return parse_json(level)
+
+
+def parse_text(lines):
+    """
+    Returns the (rows, pieces) of a text level, raising ValueError if a
+    piece line has no count.
+    """
+    rows = []
+    pieces = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 2 and set(line) - set('.# '):
+            name, count = parts
+            try:
+                pieces[name] = int(count)
+            except ValueError:
+                raise ValueError('count for {} must be a whole number, got {!r}'.format(name, count))
+        else:
+            rows.append(line)
+
+    return rows, check_pieces(pieces)
+
+
+def unreadable(message):
+    raise ValueError(message)
+
+
+def json_id(level, idx):
+    if isinstance(level, dict) and 'id' in level:
+        return str(level['id'])
+    return str(idx)
+
+
+def read_levels(path):
+    """
+    Yields (id, read) for every level in a file, where read() returns the
+    level's (rows, pieces): the board rows as strings of '.' and '#' and a
+    dict of piece names to counts. read() raises ValueError for a level that
+    is not well formed, so the others can still be read. A file that can't
+    be read at all, or a .json file that isn't valid JSON, gives a single
+    level with the path as its id.
+    """
+    try:
+        with open(path) as f:
+            text = f.read()
+    except (OSError, ValueError) as e:
+        yield path, partial(unreadable, 'can not read file: {}'.format(e))
+        return
+
+    if path.endswith('.json'):
+        try:
+            levels = json.loads(text)
+        except ValueError as e:
+            yield path, partial(unreadable, 'not valid JSON: {}'.format(e))
+            return
+
+        if isinstance(levels, dict):
+            levels = [levels]
+        if not isinstance(levels, list):
+            yield path, partial(unreadable, 'expected a level or a list of levels, got {!r}'.format(levels))
+            return
+
+    if path.endswith('.jsonl'):
+        for idx, line in enumerate(text.split('\n')):
+            if not line.strip():
+                continue
+
+            try:
+                level = json.loads(line)
+            except ValueError:
+                yield str(idx), partial(parse_json_line, line)
+            else:
+                yield json_id(level, idx), partial(parse_json, level)
+    elif path.endswith('.json'):
+        for idx, level in enumerate(levels):
+            yield json_id(level, idx), partial(parse_json, level)
+    else:
+        lines = []
+        count = 0
+        for line in text.split('\n') + ['']:
+            line = line.strip()
+            if line:
+                lines.append(line)
+            elif lines:
+                yield str(count), partial(parse_text, lines)
+                lines = []
+                count += 1
+
+
+def make_level(rows, pieces):
+    """
+    Returns the (board, shapes) for a level: the board as solve() wants it,
+    '*' for cells to fill and '#' for blocked ones, and the pieces named
+    from 'A' again.
+    """
+    widths = set(len(r) for r in rows)
+    if not rows or len(widths) != 1:
+        raise ValueError('board rows must all be the same length')
+
+    board = []
+    for r in rows:
+        if set(r) - set('.#'):
+            raise ValueError("board rows may only hold '.' and '#', got {!r}".format(r))
+        board.append(['*' if c == '.' else '#' for c in r])
+
+    reset_names()
+    shapes = []
+    for name, count in pieces.items():
+        if name not in KINDS:
+            raise ValueError('unknown piece {!r}, expected one of {}'.format(name, ', '.join(KINDS)))
+        for _ in range(count):
+            shapes.append(KINDS[name]())
+
+    return board, shapes
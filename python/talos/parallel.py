@@ -0,0 +1,110 @@
+"""
+Multi-process talos solver.
+
+Every piece that can go on the first empty cell of the board is a branch, and
+each branch is searched by the backtracker in a worker process. In first
+solution mode a shared event tells every worker to stop as soon as one of
+them finds a tiling; in all solutions mode every branch is searched to the
+end and the tilings are merged.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bitboard import board_mask, full_mask
+from cache import FailureCache
+from shapes import mycopy, piece_kinds
+from solve import branches, iter_search, piece_tables, render, search
+
+
+# Set in each worker by init_worker()
+found = None
+
+
+def init_worker(event):
+    global found
+    found = event
+
+
+def solve_branch(filled, full, counts, samples, num_rows, num_cols, all_solutions=False):
+    """
+    Worker entry point: backtracking search of one branch. Returns the first
+    list of (kind index, mask) placements that finishes the board, or None,
+    or the list of all of them in all solutions mode.
+    """
+    tables, sizes, edges = piece_tables(samples, num_rows, num_cols)
+    stats = {'nodes': 0, 'pruned': 0}
+    cache = FailureCache()
+    if all_solutions:
+        return list(iter_search(filled, full, list(counts), tables, sizes, edges, stats, cache=cache))
+
+    placed = search(filled, full, counts, tables, sizes, edges, stats, found, cache)
+    if placed is not None:
+        found.set()
+
+    return placed
+
+
+def solve_parallel(board, shapes, workers=None, all_solutions=False):
+    """
+    Same as solve(board, shapes, ...) but spread over `workers` processes (all
+    cores by default): returns the solved board or False. With
+    `all_solutions`, returns the list of every tiling instead, each once.
+    """
+    workers = workers or os.cpu_count()
+    num_rows = len(board)
+    num_cols = len(board[0])
+
+    kinds = list(piece_kinds(shapes).values())
+    samples = [k[0] for k in kinds]
+    counts = [len(k) for k in kinds]
+    tables, sizes, edges = piece_tables(samples, num_rows, num_cols)
+    filled = board_mask(board)
+    full = full_mask(num_rows, num_cols)
+
+    if not any(counts):
+        if filled != full:
+            return [] if all_solutions else False
+        return [mycopy(board)] if all_solutions else board
+
+    stats = {'nodes': 0, 'pruned': 0}
+    # The counts while a branch is yielded are the pieces left after it
+    first = [
+        (idx, mask, tuple(counts))
+        for idx, mask in branches(filled, full, counts, tables, sizes, edges, stats)
+    ]
+
+    event = multiprocessing.Event()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(event,)) as pool:
+        futures = {
+            pool.submit(solve_branch, filled | mask, full, rest_counts, samples, num_rows, num_cols, all_solutions): (idx, mask)
+            for idx, mask, rest_counts in first
+        }
+
+        if all_solutions:
+            seen = set()
+            solutions = []
+            for future in futures:
+                for rest in future.result():
+                    placed = [futures[future]] + rest
+                    key = frozenset(placed)
+                    if key in seen:
+                        continue
+
+                    seen.add(key)
+                    solutions.append(render(mycopy(board), kinds, placed))
+
+            return solutions
+
+        for future in as_completed(futures):
+            rest = future.result()
+            if rest is None:
+                continue
+
+            event.set()
+            for other in futures:
+                other.cancel()
+
+            return render(board, kinds, [futures[future]] + rest)
+
+    return False
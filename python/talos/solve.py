@@ -1,154 +1,437 @@
-from copy import (
-    copy,
-    deepcopy
-)
-from shapes import (
-    LeftZed,
-    RightZed,
-    LeftEll,
-    RightEll,
-    Tee,
-    Square,
-    Rectangle,
-    print_board,
-    print_shape,
-    mycopy
-)
-
-
-def shape_start_pos(shape):
-    count = 0
-    for idx, v in enumerate(shape[0]):
-        if v == '*':
-            count += 1
-        if (count - 1) != idx:
-            break
-
-    return count
-
-
-def shape_fits_on_board_at_pos(board, shape, startRow=0, startCol=0):
-    shape_width = len(shape[0])
-    startCol = startCol - shape_start_pos(shape)
-
-    # Boundary Check
-    shape_len = len(shape)
-    if shape_len + startRow > len(board):
-        return False
-    if shape_width + startCol > len(board[0]):
-        return False
-
-    for row in range(len(board)):
-        if row < startRow:
-            continue
-
-        for col in range(len(board[0])):
-            if col < startCol:
-                continue
-
-            shape_row = row - startRow
-            shape_col = col - startCol
-            try:
-                new_board_value = shape[shape_row][shape_col]
-                if new_board_value != '*' and board[row][col] != '*':
-                    return False
-            except IndexError:
-                continue
-
-    return True
-
-
-def is_solved(board):
-    for row in range(len(board)):
-        for col in range(len(board[0])):
-            if board[row][col] == '*':
-                return False
-
-    return True
-
-
-def add_shape_to_board_at_pos_if_fits(board, shape, startRow=0, startCol=0):
-    num_rows = len(board)
-    num_cols = len(board[0])
-
-    if not shape_fits_on_board_at_pos(board, shape, startRow=startRow, startCol=startCol):
-        return False
-
-    startCol = startCol - shape_start_pos(shape)
-    for row in range(num_rows):
-        if row < startRow:
-            continue
-
-        for col in range(num_cols):
-            if col < startCol:
-                continue
-
-            try:
-                new_board_value = shape[row - startRow][col - startCol]
-                if new_board_value == '*':
-                    continue
-            except IndexError:
-                break
-
-            board[row][col] = new_board_value
-
-    return True
-
-
-def solve(board, shapes, num_rows, num_cols, i):
-    if not shapes:
-        if is_solved(board):
-            return board
-        else:
-            return False
-
-    for row in range(num_rows):
-        for col in range(num_cols):
-            if board[row][col] != '*':
-                continue
-
-            for shape in sorted(shapes, key=lambda s: s.name):
-                for rotation in shape.rotations():
-                    originalBoard = mycopy(board)
-                    if add_shape_to_board_at_pos_if_fits(board, rotation, startRow=row, startCol=col):
-                        shapesCopy = shapes - set([shape])
-                        solved = solve(board, shapesCopy, num_rows, num_cols, i + 1)
-                        if not solved:
-                            board = originalBoard
-                        else:
-                            return solved
-            else:
-                return False
-
-
-def prep():
-    # board size
-    num_rows = 7
-    num_cols = 8
-
-    shape_defs = [
-        # shape, quantity
-        (RightEll, 1),
-        (LeftEll,  1),
-        (Square,   4),
-        (LeftZed,  1),
-        (RightZed, 1),
-        (Rectangle,2),
-        (Tee,      4),
-    ]
-
-    shapes = []
-    for s, c in shape_defs:
-        for _ in range(c):
-            shapes.append(s())
-
-    board = []
-    for row in range(num_rows):
-        board.append(['*'] * num_cols)
-    b = solve(board, set(shapes), num_rows, num_cols, 0)
-    if b:
-        print_board(b)
-
-
-if __name__ == '__main__':
-    prep()
+import argparse
+import dlx
+import json
+import sys
+import time
+from cache import FailureCache
+from math import gcd
+from bitboard import (
+    board_mask,
+    column_masks,
+    count_cells,
+    fill,
+    first_empty,
+    full_mask,
+    neighbours,
+    piece_masks,
+    placements,
+    region,
+    rotation_cells,
+    symmetries,
+    transform
+)
+from level import make_level, read_levels
+from shapes import (
+    LeftZed,
+    RightZed,
+    LeftEll,
+    RightEll,
+    Tee,
+    Square,
+    Rectangle,
+    piece_kinds,
+    print_board,
+    mycopy
+)
+
+
+def dead_end(filled, full, mask, counts, tables, sizes, edges):
+    """
+    Returns True if placing `mask` cut off an empty region the remaining pieces
+    can't fill: one whose size isn't a multiple of what they can cover, or
+    one too small for more than one piece that isn't exactly the shape of a
+    remaining piece. Only the regions next to `mask` can have changed, so
+    only those are flood filled.
+    """
+    unit = 0
+    smallest = 0
+    for idx, count in enumerate(counts):
+        if count:
+            unit = gcd(unit, sizes[idx])
+            if not smallest or sizes[idx] < smallest:
+                smallest = sizes[idx]
+
+    if not unit:
+        return False
+
+    num_cols, first, last = edges
+    empty = full & ~filled
+    seeds = neighbours(mask, num_cols, first, last) & empty
+    while seeds:
+        area = region(seeds & -seeds, empty, num_cols, first, last)
+        seeds &= ~area
+
+        size = count_cells(area)
+        if size % unit:
+            return True
+
+        if size < 2 * smallest:
+            pos = (area & -area).bit_length() - 1
+            for idx, count in enumerate(counts):
+                if count and sizes[idx] == size and area in tables[idx][pos]:
+                    break
+            else:
+                return True
+
+    return False
+
+
+def branches(filled, full, counts, tables, sizes, edges, stats):
+    """
+    Yields (kind index, mask) for every piece that can go on the first empty
+    cell of the `filled` bitboard without leaving a dead end. While a piece
+    is yielded, `counts` has one piece less of its kind, as if it had been
+    placed, and the count is put back once its kind is done.
+    """
+    pos = first_empty(filled, full)
+    if pos is None:
+        return
+
+    for idx in range(len(counts)):
+        if not counts[idx]:
+            continue
+
+        counts[idx] -= 1
+        try:
+            for mask in tables[idx][pos]:
+                if mask & filled:
+                    continue
+
+                if dead_end(filled | mask, full, mask, counts, tables, sizes, edges):
+                    stats['pruned'] += 1
+                    continue
+
+                yield idx, mask
+        finally:
+            counts[idx] += 1
+
+
+# How often iter_search() calls its progress callback
+PROGRESS_NODES = 100000
+
+
+def iter_search(filled, full, counts, tables, sizes, edges, stats, stop=None, cache=None, path=None, progress=None):
+    """
+    Yields every way of covering the empty cells of the `filled` bitboard,
+    always filling the first empty cell next. `counts` is the list of how
+    many pieces of each kind are left, `tables` their placement tables and
+    `sizes` their number of cells, so identical pieces are only tried once
+    per cell. Each solution is a list of (kind index, mask) placements.
+
+    Pieces are placed and taken back by updating `counts` and the `path` of
+    placements so far in place, so nothing is copied until a solution is
+    found. The search gives up once the `stop` event is set. Positions
+    without a solution are recorded in `cache` (a FailureCache) and skipped
+    when they come up again. `progress` is called with the stats every
+    PROGRESS_NODES nodes.
+    """
+    if path is None:
+        path = []
+
+    stats['nodes'] += 1
+    if progress is not None and not stats['nodes'] % PROGRESS_NODES:
+        progress(stats)
+    if stop is not None and stop.is_set():
+        return
+
+    if not any(counts):
+        if filled == full:
+            yield list(path)
+        return
+
+    if cache is not None and cache.failed(filled, tuple(counts)):
+        return
+
+    solved = False
+    for idx, mask in branches(filled, full, counts, tables, sizes, edges, stats):
+        path.append((idx, mask))
+        for placed in iter_search(filled | mask, full, counts, tables, sizes, edges, stats, stop, cache, path, progress):
+            solved = True
+            yield placed
+        path.pop()
+
+    if cache is not None and not solved and not (stop is not None and stop.is_set()):
+        cache.add(filled, tuple(counts))
+
+
+def search(filled, full, counts, tables, sizes, edges, stats, stop=None, cache=None):
+    # First solution of iter_search(), or None
+    return next(iter_search(filled, full, list(counts), tables, sizes, edges, stats, stop, cache), None)
+
+
+def piece_tables(samples, num_rows, num_cols):
+    """
+    Returns the (tables, sizes, edges) the search needs for pieces of the
+    kinds of `samples`, one shape per kind.
+    """
+    tables = [placements(s, num_rows, num_cols) for s in samples]
+    sizes = [len(rotation_cells(s.shape)) for s in samples]
+    edges = (num_cols,) + column_masks(num_rows, num_cols)
+    return tables, sizes, edges
+
+
+def render(board, kinds, placed):
+    # Identical pieces are only told apart by their letters, given out in the
+    # order the pieces were placed
+    used = [0] * len(kinds)
+    for idx, mask in placed:
+        fill(board, mask, kinds[idx][used[idx]].name)
+        used[idx] += 1
+
+    return board
+
+
+def solve(board, shapes, num_rows, num_cols, i, stats=None, cache=None):
+    if cache is None:
+        cache = FailureCache()
+    if stats is None:
+        stats = {}
+    stats['nodes'] = 0
+    stats['pruned'] = 0
+
+    kinds = list(piece_kinds(shapes).values())
+    counts = tuple(len(k) for k in kinds)
+    tables, sizes, edges = piece_tables([k[0] for k in kinds], num_rows, num_cols)
+
+    placed = search(board_mask(board), full_mask(num_rows, num_cols), counts, tables, sizes, edges, stats, cache=cache)
+    if placed is None:
+        return False
+
+    return render(board, kinds, placed)
+
+
+def unique_solutions(board, shapes, solutions):
+    """
+    Filters a stream of solved boards down to one per class of solutions
+    that are rotations or reflections of each other (only counting the ones
+    that also map the blocked cells of `board` onto themselves). Reflecting
+    a left handed piece makes it right handed, so an image only counts if it
+    is itself a tiling with `shapes`. A solution is kept if its sorted
+    (kind, mask) pairs are the smallest of its class, so nothing has to be
+    remembered between solutions.
+    """
+    num_rows = len(board)
+    num_cols = len(board[0])
+    blocked = full_mask(num_rows, num_cols) & ~board_mask(board)
+    perms = [p for p in symmetries(num_rows, num_cols) if transform(blocked, p) == blocked]
+
+    kind_of = {}
+    for idx, kind in enumerate(piece_kinds(shapes).values()):
+        for masks in placements(kind[0], num_rows, num_cols):
+            for mask in masks:
+                kind_of[mask] = idx
+
+    for solution in solutions:
+        key = sorted((kind_of[m], m) for m in piece_masks(solution).values())
+        kinds = [idx for idx, _ in key]
+        for p in perms:
+            moved = [transform(m, p) for _, m in key]
+            if any(m not in kind_of for m in moved):
+                continue
+            image = sorted((kind_of[m], m) for m in moved)
+            if [idx for idx, _ in image] == kinds and image < key:
+                break
+        else:
+            yield solution
+
+
+def iter_solutions(board, shapes, unique=False, progress=None, stats=None, cache=None):
+    """
+    Yields every tiling of `board` with all of `shapes` found by the
+    backtracker, each as a new board. With `unique`, tilings that are a
+    rotation or reflection of one already given are left out. `progress` is
+    called every PROGRESS_NODES nodes with the node count and nodes per
+    second so far.
+    """
+    num_rows = len(board)
+    num_cols = len(board[0])
+    if cache is None:
+        cache = FailureCache()
+    if stats is None:
+        stats = {}
+    stats['nodes'] = 0
+    stats['pruned'] = 0
+
+    kinds = list(piece_kinds(shapes).values())
+    counts = [len(k) for k in kinds]
+    tables, sizes, edges = piece_tables([k[0] for k in kinds], num_rows, num_cols)
+
+    report = None
+    if progress is not None:
+        start = time.perf_counter()
+
+        def report_rate(stats):
+            elapsed = time.perf_counter() - start
+            progress(stats['nodes'], stats['nodes'] / elapsed if elapsed else 0.0)
+
+        report = report_rate
+
+    found = iter_search(board_mask(board), full_mask(num_rows, num_cols), counts, tables, sizes, edges, stats, cache=cache, progress=report)
+    solutions = (render(mycopy(board), kinds, placed) for placed in found)
+    if unique:
+        solutions = unique_solutions(board, shapes, solutions)
+
+    for solution in solutions:
+        yield solution
+
+    if report is not None:
+        report(stats)
+
+
+def count_solutions(board, shapes, unique=False, progress=None):
+    return sum(1 for _ in iter_solutions(board, shapes, unique, progress))
+
+
+def solve_level(board, shapes, engine='backtrack', all_solutions=False, workers=None, stats=None, cache=None, unique=False, progress=None):
+    """
+    Solves a board with the given engine. Returns the solved board or False,
+    or an iterator over every solution with `all_solutions`. Only the
+    backtracking engine can be split across `workers`.
+    """
+    if workers and engine != 'backtrack':
+        raise ValueError('only the backtrack engine runs on workers, not {}'.format(engine))
+
+    num_rows = len(board)
+    num_cols = len(board[0])
+
+    if not all_solutions:
+        if workers:
+            from parallel import solve_parallel
+            return solve_parallel(board, shapes, workers)
+        if engine == 'dlx':
+            return dlx.solve(board, shapes, num_rows, num_cols)
+
+        return solve(board, set(shapes), num_rows, num_cols, 0, stats, cache)
+
+    if workers:
+        from parallel import solve_parallel
+        solutions = solve_parallel(board, shapes, workers, all_solutions=True)
+    elif engine == 'dlx':
+        solutions = dlx.iter_solutions(board, shapes, num_rows, num_cols)
+    else:
+        return iter_solutions(board, shapes, unique, progress, stats, cache)
+
+    return unique_solutions(board, shapes, solutions) if unique else solutions
+
+
+def print_progress(nodes, rate):
+    print('{} nodes, {:.0f} nodes/s'.format(nodes, rate), file=sys.stderr, flush=True)
+
+
+def run(level_id, board, shapes, engine='backtrack', all_solutions=False, show_stats=False, workers=None, as_json=False,
+        unique=False, count_only=False, progress=False):
+    stats = {}
+    cache = FailureCache()
+    all_solutions = all_solutions or count_only
+    start = time.perf_counter()
+    result = solve_level(board, shapes, engine, all_solutions, workers, stats, cache, unique, print_progress if progress else None)
+
+    if all_solutions:
+        # Solutions are printed as they are found
+        count = 0
+        solutions = []
+        for b in result:
+            count += 1
+            if count_only:
+                continue
+            if as_json:
+                solutions.append([''.join(r) for r in b])
+            else:
+                print_board(b)
+        result = count
+    seconds = time.perf_counter() - start
+
+    if as_json:
+        record = {'id': level_id}
+        if all_solutions:
+            if not count_only:
+                record['solutions'] = solutions
+            record['count'] = count
+        else:
+            record['solved'] = bool(result)
+            record['board'] = [''.join(r) for r in result] if result else None
+        if show_stats and stats:
+            record['nodes'] = stats['nodes']
+            record['pruned'] = stats['pruned']
+        record['seconds'] = round(seconds, 6)
+        print(json.dumps(record), flush=True)
+        return
+
+    if all_solutions:
+        print('{} solutions'.format(count))
+    elif result:
+        print_board(result)
+    else:
+        print('{}: no solution'.format(level_id))
+
+    if show_stats and stats:
+        print('{} nodes, {} placements pruned'.format(stats['nodes'], stats['pruned']))
+        print(cache)
+
+
+def stock_level():
+    """
+    Returns the (board, shapes) of the puzzle solved when no level files are
+    given. Set the board size and pieces here.
+    """
+    # board size
+    num_rows = 7
+    num_cols = 8
+
+    shape_defs = [
+        # shape, quantity
+        (RightEll, 1),
+        (LeftEll,  1),
+        (Square,   4),
+        (LeftZed,  1),
+        (RightZed, 1),
+        (Rectangle,2),
+        (Tee,      4),
+    ]
+
+    shapes = []
+    for s, c in shape_defs:
+        for _ in range(c):
+            shapes.append(s())
+
+    board = []
+    for row in range(num_rows):
+        board.append(['*'] * num_cols)
+
+    return board, shapes
+
+
+def prep(engine='backtrack', all_solutions=False, show_stats=False, workers=None, as_json=False,
+         unique=False, count_only=False, progress=False):
+    board, shapes = stock_level()
+    run('stock', board, shapes, engine, all_solutions, show_stats, workers, as_json, unique, count_only, progress)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('levels', nargs='*', help='level files (.json, .jsonl or text, see level.py), the stock puzzle in prep() if none')
+    parser.add_argument('--engine', choices=['backtrack', 'dlx'], default='backtrack')
+    parser.add_argument('--all', action='store_true', help='print every solution as it is found')
+    parser.add_argument('--count', action='store_true', help='only count the solutions')
+    parser.add_argument('--unique', action='store_true', help='leave out solutions that are a rotation or reflection of another')
+    parser.add_argument('--progress', action='store_true', help='report the backtracker\'s nodes per second on stderr while enumerating')
+    parser.add_argument('--stats', action='store_true', help='print the backtracker\'s node count and cache statistics')
+    parser.add_argument('--workers', type=int, help='split the backtracking search across this many processes')
+    parser.add_argument('--json', action='store_true', help='print one JSON line per level instead of the boards')
+    args = parser.parse_args()
+    if args.workers and args.engine != 'backtrack':
+        parser.error('--workers only works with --engine backtrack')
+
+    if not args.levels:
+        prep(args.engine, args.all, args.stats, args.workers, args.json, args.unique, args.count, args.progress)
+
+    for path in args.levels:
+        for level_id, read in read_levels(path):
+            try:
+                board, shapes = make_level(*read())
+            except ValueError as e:
+                print(json.dumps({'id': level_id, 'error': str(e)}) if args.json else '{}: {}'.format(level_id, e))
+                continue
+
+            run(level_id, board, shapes, args.engine, args.all, args.stats, args.workers, args.json,
+                args.unique, args.count, args.progress)
@@ -0,0 +1,74 @@
+import unittest
+
+import bitboard
+from shapes import Square, Tee
+
+
+class BitboardTest(unittest.TestCase):
+
+    def test_masks(self):
+        self.assertEqual(bitboard.cell_bit(1, 2, 4), 1 << 6)
+        self.assertEqual(bitboard.full_mask(2, 3), 0b111111)
+        self.assertEqual(bitboard.board_mask([['*', '#'], ['A', '*']]), 0b0110)
+
+    def test_rotation_mask(self):
+        down, left = Tee().rotations()[:2]
+        self.assertEqual(bitboard.rotation_cells(down), [(0, 0), (0, 1), (0, 2), (1, 1)])
+        self.assertEqual(bitboard.rotation_mask(down, 4), (0b100111, 0, 2, 2))
+        # Anchored on its top cell, one column right of its leftmost cell
+        self.assertEqual(bitboard.rotation_cells(left), [(0, 0), (1, -1), (1, 0), (2, 0)])
+        self.assertEqual(bitboard.rotation_mask(left, 4), (0b1000110010, -1, 0, 3))
+
+    def test_place(self):
+        down, left = [bitboard.rotation_mask(r, 4) for r in Tee().rotations()[:2]]
+        self.assertEqual(bitboard.place(down, 1, 1, 3, 4), 0b100111 << 5)
+        self.assertEqual(bitboard.place(left, 0, 1, 3, 4), 0b1000110010)
+        # Past the left, right and bottom edges
+        self.assertEqual(bitboard.place(left, 0, 0, 3, 4), 0)
+        self.assertEqual(bitboard.place(down, 0, 2, 3, 4), 0)
+        self.assertEqual(bitboard.place(left, 1, 1, 3, 4), 0)
+
+    def test_first_empty(self):
+        self.assertEqual(bitboard.first_empty(0b0111, 0b1111), 3)
+        self.assertEqual(bitboard.first_empty(0b0101, 0b1111), 1)
+        self.assertIsNone(bitboard.first_empty(0b1111, 0b1111))
+
+    def test_fill(self):
+        board = [['*', '*'], ['*', '*']]
+        bitboard.fill(board, 0b1001, 'A')
+        self.assertEqual(board, [['A', '*'], ['*', 'A']])
+
+    def test_placements(self):
+        # The four rotations of a Square cover the same cells
+        square = 0b11011
+        self.assertEqual(bitboard.placements(Square(), 3, 3), [
+            [square], [square << 1], [],
+            [square << 3], [square << 4], [],
+            [], [], [],
+        ])
+        self.assertEqual(len(bitboard.placements(Tee(), 3, 3)[1]), 3)
+
+    def test_placements_cached(self):
+        table = bitboard.placements(Tee(), 4, 5)
+        self.assertIs(bitboard.placements(Tee(), 4, 5), table)
+        self.assertIsNot(bitboard.placements(Tee(), 5, 4), table)
+
+    def test_neighbours(self):
+        first, last = bitboard.column_masks(3, 3)
+        self.assertEqual((first, last), (0b001001001, 0b100100100))
+        self.assertEqual(bitboard.neighbours(0b000010000, 3, first, last), 0b010101010)
+        # Nothing wraps around from the first column to the row above
+        self.assertEqual(bitboard.neighbours(0b000001000, 3, first, last), 0b001010001)
+
+    def test_region(self):
+        first, last = bitboard.column_masks(3, 3)
+        empty = 0b110001100
+        self.assertEqual(bitboard.region(1 << 7, empty, 3, first, last), 0b110000000)
+        # Cells 2 and 3 are next to each other in the mask, not on the board
+        self.assertEqual(bitboard.region(1 << 2, empty, 3, first, last), 1 << 2)
+        self.assertEqual(bitboard.region(1 << 3, empty, 3, first, last), 1 << 3)
+        self.assertEqual(bitboard.count_cells(empty), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
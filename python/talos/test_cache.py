@@ -0,0 +1,49 @@
+import unittest
+
+from cache import FailureCache
+
+
+class FailureCacheTest(unittest.TestCase):
+
+    def test_failed(self):
+        c = FailureCache()
+        self.assertFalse(c.failed(0b11, (1, 0)))
+        c.add(0b11, (1, 0))
+        self.assertTrue(c.failed(0b11, (1, 0)))
+        self.assertFalse(c.failed(0b11, (0, 1)))
+        self.assertEqual(c.hits, 1)
+        self.assertEqual(c.misses, 2)
+        self.assertAlmostEqual(c.hit_rate(), 1 / 3)
+        self.assertIn((0b11, (1, 0)), c)
+
+    def test_evicts_least_recent(self):
+        c = FailureCache(max_entries=2)
+        c.add(1, (1,))
+        c.add(2, (1,))
+        # A hit makes 1 the most recent, so 2 goes first
+        self.assertTrue(c.failed(1, (1,)))
+        c.add(3, (1,))
+        self.assertEqual(len(c), 2)
+        self.assertEqual(c.evictions, 1)
+        self.assertTrue(c.failed(1, (1,)))
+        self.assertFalse(c.failed(2, (1,)))
+        self.assertTrue(c.failed(3, (1,)))
+
+    def test_clear(self):
+        c = FailureCache(max_entries=1)
+        c.add(1, (1,))
+        c.add(2, (1,))
+        c.failed(2, (1,))
+        c.clear()
+        self.assertEqual((len(c), c.hits, c.misses, c.evictions), (0, 0, 0, 0))
+        self.assertEqual(c.hit_rate(), 0.0)
+
+    def test_str(self):
+        c = FailureCache()
+        c.add(1, (1,))
+        c.failed(1, (1,))
+        self.assertEqual(str(c), 'cache: 1 entries, 1 hits, 0 misses (100.0% hit rate), 0 evictions')
+
+
+if __name__ == '__main__':
+    unittest.main()
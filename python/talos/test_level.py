@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+
+from level import make_level, parse_json, parse_text, read_levels
+from shapes import Square, Tee
+
+
+class LevelTest(unittest.TestCase):
+
+    def write(self, name, text):
+        path = os.path.join(tempfile.mkdtemp(), name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_make_level(self):
+        board, shapes = make_level(['..#', '...'], {'Tee': 1, 'Square': 1})
+        self.assertEqual(board, [['*', '*', '#'], ['*', '*', '*']])
+        self.assertEqual([(type(s), s.name) for s in shapes], [(Tee, 'A'), (Square, 'B')])
+        # Names start from 'A' again for every level
+        _, shapes = make_level(['....'], {'Square': 1})
+        self.assertEqual(shapes[0].name, 'A')
+
+    def test_make_level_errors(self):
+        for rows, pieces in (
+            ([], {'Tee': 1}),
+            (['....', '...'], {'Tee': 1}),
+            (['..x.'], {'Tee': 1}),
+            (['....'], {'Pentomino': 1}),
+        ):
+            with self.assertRaises(ValueError, msg=rows):
+                make_level(rows, pieces)
+
+    def test_parse_json(self):
+        self.assertEqual(
+            parse_json({'rows': 2, 'cols': 3, 'blocked': [[1, 2]], 'pieces': {'Tee': 1}}),
+            (['...', '..#'], {'Tee': 1}),
+        )
+
+    def test_parse_json_errors(self):
+        for level in (
+            ['....'],
+            {'board': ['....']},
+            {'pieces': {'Tee': 1}},
+            {'board': '....', 'pieces': {'Tee': 1}},
+            {'board': ['....'], 'pieces': {'Tee': '1'}},
+            {'board': ['....'], 'pieces': {'Tee': -1}},
+            {'rows': 1, 'cols': 4, 'blocked': [[1, 0]], 'pieces': {'Tee': 1}},
+        ):
+            with self.assertRaises(ValueError, msg=level):
+                parse_json(level)
+
+    def test_parse_text(self):
+        self.assertEqual(parse_text(['..#', '...', 'Tee 1']), (['..#', '...'], {'Tee': 1}))
+
+    def test_parse_text_errors(self):
+        with self.assertRaises(ValueError):
+            parse_text(['....', 'Tee four'])
+
+        # A row with a space is a bad board row, not a piece line
+        rows, pieces = parse_text(['.. ..', 'Tee 1'])
+        self.assertEqual(rows, ['.. ..'])
+        with self.assertRaises(ValueError):
+            make_level(rows, pieces)
+
+    def read_all(self, path):
+        return [(level_id, read()) for level_id, read in read_levels(path)]
+
+    def test_read_json(self):
+        path = self.write('level.json', '{"id": "a", "rows": 2, "cols": 3, "blocked": [[1, 2]], "pieces": {"Tee": 1}}')
+        self.assertEqual(self.read_all(path), [('a', (['...', '..#'], {'Tee': 1}))])
+
+        path = self.write('levels.json', '[{"board": ["...."], "pieces": {"Rectangle": 1}}, {"board": ["##"], "pieces": {}}]')
+        self.assertEqual(self.read_all(path), [
+            ('0', (['....'], {'Rectangle': 1})),
+            ('1', (['##'], {})),
+        ])
+
+    def test_read_jsonl(self):
+        path = self.write('levels.jsonl', '{"id": "a", "board": ["...."], "pieces": {"Rectangle": 1}}\n\n'
+                                          '{"board": ["##"], "pieces": {}}\n')
+        self.assertEqual(self.read_all(path), [
+            ('a', (['....'], {'Rectangle': 1})),
+            ('2', (['##'], {})),
+        ])
+
+    def test_read_text(self):
+        path = self.write('levels.txt', '....\n....\nSquare 2\n\n\n..#\n...\nTee 1\n')
+        self.assertEqual(self.read_all(path), [
+            ('0', (['....', '....'], {'Square': 2})),
+            ('1', (['..#', '...'], {'Tee': 1})),
+        ])
+
+    def test_read_levels_keeps_going(self):
+        path = self.write('levels.jsonl', '\n'.join([
+            '{"id": "a", "board": ["...."], "pieces": {"Rectangle": 1}}',
+            '{"id": "b", "board": ["...."]}',
+            'not json',
+            '{"id": "c", "rows": 1, "cols": 4, "pieces": {"Rectangle": 1}}',
+        ]))
+        ids = []
+        errors = []
+        for level_id, read in read_levels(path):
+            ids.append(level_id)
+            try:
+                read()
+            except ValueError:
+                errors.append(level_id)
+
+        self.assertEqual(ids, ['a', 'b', '2', 'c'])
+        self.assertEqual(errors, ['b', '2'])
+
+    def test_read_levels_unreadable(self):
+        missing = os.path.join(tempfile.mkdtemp(), 'missing.txt')
+        for path in (
+            missing,
+            self.write('bad.json', '[{"board": ["...."], "pieces": {"Rectangle": 1}'),
+            self.write('number.json', '4'),
+        ):
+            levels = list(read_levels(path))
+            self.assertEqual([level_id for level_id, _ in levels], [path])
+            with self.assertRaises(ValueError):
+                levels[0][1]()
+
+    def test_read_levels_text(self):
+        path = self.write('levels.txt', '....\nRectangle 1\n\n....\nTee four\n\n....\nRectangle 1\n')
+        levels = list(read_levels(path))
+        self.assertEqual([level_id for level_id, _ in levels], ['0', '1', '2'])
+        self.assertEqual(levels[2][1](), (['....'], {'Rectangle': 1}))
+        with self.assertRaises(ValueError):
+            levels[1][1]()
+
+if __name__ == '__main__':
+    unittest.main()
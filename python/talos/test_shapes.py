@@ -0,0 +1,18 @@
+import unittest
+
+from shapes import Square, Tee, piece_kinds, reset_names
+
+
+class ShapesTest(unittest.TestCase):
+
+    def test_piece_kinds(self):
+        reset_names()
+        a, b, c, d = Tee(), Square(), Tee(), Square()
+        kinds = piece_kinds({d, c, b, a})
+        self.assertEqual(list(kinds), [Tee, Square])
+        self.assertEqual(kinds[Tee], [a, c])
+        self.assertEqual(kinds[Square], [b, d])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import bitboard
+import dlx
+import solve
+from cache import FailureCache
+from level import make_level
+from parallel import solve_parallel
+from shapes import LeftEll, LeftZed, Rectangle, RightEll, RightZed, Square, Tee, piece_kinds, reset_names
+
+
+STOCK_PIECES = [
+    (RightEll, 1),
+    (LeftEll, 1),
+    (Square, 4),
+    (LeftZed, 1),
+    (RightZed, 1),
+    (Rectangle, 2),
+    (Tee, 4),
+]
+
+STOCK = [
+    'ABIIIICC',
+    'ABBBDDCC',
+    'AAEEDDFF',
+    'GGEEKLFF',
+    'NGGKKLLO',
+    'NNHHKLOO',
+    'NHHJJJJO',
+]
+
+LEVELS = [
+    (['....'] * 4, [(Tee, 4)]),
+    (['##..', '##..', '....', '....'], [(Square, 1), (RightEll, 2)]),
+    (['.....', '..#..', '.....', '.....', '.....'], [(RightEll, 1), (LeftEll, 2), (Tee, 1), (Rectangle, 2)]),
+    (['.....'] * 4, [(Rectangle, 1), (LeftZed, 1), (Square, 1), (LeftEll, 2)]),
+    (['......', '......', '......', '.#....', '....#.'],
+     [(RightEll, 2), (Tee, 1), (LeftEll, 1), (RightZed, 2), (Rectangle, 1)]),
+    (['....', '.##.', '....'], [(Tee, 2), (Square, 1)]),
+]
+
+
+def level(rows, pieces):
+    """
+    Returns the (board, shapes) for board rows of '.' and '#' and a list of
+    (kind, count), the pieces named from 'A' as in a fresh run.
+    """
+    reset_names()
+    board = [['*' if c == '.' else '#' for c in r] for r in rows]
+    return board, [kind() for kind, count in pieces for _ in range(count)]
+
+
+def rows(board):
+    return [''.join(r) for r in board]
+
+
+def backtrack(level_rows, pieces):
+    board, shape_list = level(level_rows, pieces)
+    return solve.solve(board, set(shape_list), len(board), len(board[0]), 0)
+
+
+def dlx_all(level_rows, pieces):
+    board, shape_list = level(level_rows, pieces)
+    return [rows(b) for b in dlx.iter_solutions(board, shape_list, len(board), len(board[0]))]
+
+
+def backtrack_all(level_rows, pieces, cache=None):
+    board, shape_list = level(level_rows, pieces)
+    return [rows(b) for b in solve.iter_solutions(board, shape_list, cache=cache)]
+
+
+def parallel_all(level_rows, pieces):
+    board, shape_list = level(level_rows, pieces)
+    return [rows(b) for b in solve_parallel(board, shape_list, 2, all_solutions=True)]
+
+
+class SolveTest(unittest.TestCase):
+
+    def test_stock(self):
+        reset_names()
+        board, shape_list = solve.stock_level()
+        self.assertEqual(rows(solve.solve(board, set(shape_list), 7, 8, 0)), STOCK)
+
+    def test_blocked(self):
+        b = backtrack(['##..', '##..', '....', '....'], [(Square, 1), (RightEll, 2)])
+        self.assertEqual(rows(b), ['##AA', '##AA', 'BBBC', 'BCCC'])
+
+    def test_unsolvable(self):
+        self.assertFalse(backtrack(['....', '.##.', '....'], [(Tee, 2), (Square, 1)]))
+
+    def test_identical_pieces(self):
+        # One branch per kind, not one per Square
+        stats = {}
+        board, shape_list = level(['....'] * 2, [(Square, 2)])
+        self.assertTrue(solve.solve(board, set(shape_list), 2, 4, 0, stats))
+        self.assertEqual(stats['nodes'], 3)
+
+    def test_dead_end(self):
+        # Columns 0 and 3 of a 2x6 board filled, with two pieces left
+        tables = [bitboard.placements(k(), 2, 6) for k in (Square, Tee)]
+        sizes = [4, 4]
+        edges = (6,) + bitboard.column_masks(2, 6)
+        full = bitboard.full_mask(2, 6)
+        mask = 0b001001001001
+        # Both 2x2 regions left fit a Square
+        self.assertFalse(solve.dead_end(mask, full, mask, (2, 0), tables, sizes, edges))
+        # Neither fits a Tee
+        self.assertTrue(solve.dead_end(mask, full, mask, (0, 2), tables, sizes, edges))
+        # A region of 2 can't be filled with 4 cell pieces
+        mask = 0b010010010010
+        self.assertTrue(solve.dead_end(mask, full, mask, (2, 0), tables, sizes, edges))
+
+    def test_dead_end_keeps_solutions(self):
+        for level_rows, pieces in LEVELS:
+            pruned = backtrack_all(level_rows, pieces)
+            with mock.patch.object(solve, 'dead_end', return_value=False):
+                unpruned = backtrack_all(level_rows, pieces)
+            self.assertEqual(pruned, unpruned, level_rows)
+
+    def test_dead_end_prunes(self):
+        stats = {}
+        board, shape_list = level(['......'] * 6, [(Square, 3), (Tee, 2), (LeftEll, 2), (RightZed, 2)])
+        self.assertTrue(solve.solve(board, set(shape_list), 6, 6, 0, stats))
+        self.assertGreater(stats['pruned'], 0)
+
+    def test_cache(self):
+        for level_rows, pieces in LEVELS:
+            cache = FailureCache()
+            self.assertEqual(backtrack_all(level_rows, pieces, cache), backtrack_all(level_rows, pieces), level_rows)
+
+        # The same dead ends come up again on a 6x6 board
+        cache = FailureCache()
+        backtrack_all(['......'] * 6, [(Square, 3), (Tee, 2), (LeftEll, 2), (RightZed, 2)], cache)
+        self.assertGreater(len(cache), 0)
+        self.assertGreater(cache.hits, 0)
+
+    def test_run_json(self):
+        board, shape_list = make_level(['##..', '##..', '....', '....'], {'Square': 1, 'RightEll': 2})
+        out = io.StringIO()
+        with redirect_stdout(out):
+            solve.run('a', board, shape_list, as_json=True)
+
+        record = json.loads(out.getvalue())
+        self.assertEqual(record['id'], 'a')
+        self.assertTrue(record['solved'])
+        self.assertEqual(record['board'], ['##AA', '##AA', 'BBBC', 'BCCC'])
+
+    def test_in_place(self):
+        board, shape_list = level(['....'] * 4, [(Tee, 4)])
+        kinds = list(piece_kinds(shape_list).values())
+        tables, sizes, edges = solve.piece_tables([k[0] for k in kinds], 4, 4)
+        full = bitboard.full_mask(4, 4)
+        counts = [4]
+        path = []
+        found = solve.iter_search(0, full, counts, tables, sizes, edges, {'nodes': 0, 'pruned': 0}, path=path)
+        first = next(found)
+        # Solutions are copies, the path and counts are the search's own
+        self.assertEqual(first, path)
+        self.assertIsNot(first, path)
+        self.assertEqual(counts, [0])
+        # Pieces are taken back as the search unwinds
+        self.assertEqual(len(list(found)), 1)
+        self.assertEqual((counts, path), ([4], []))
+        self.assertEqual(len(first), 4)
+    def test_count_solutions(self):
+        for level_rows, pieces in LEVELS:
+            board, shape_list = level(level_rows, pieces)
+            self.assertEqual(solve.count_solutions(board, shape_list), len(dlx_all(level_rows, pieces)), level_rows)
+
+    def test_unique(self):
+        # The two tilings are mirror images
+        board, shape_list = level(['....'] * 4, [(Tee, 4)])
+        self.assertEqual(solve.count_solutions(board, shape_list, unique=True), 1)
+        # Only the reflection in the diagonal keeps the blocked corner in
+        # place, and it turns the RightElls into LeftElls
+        board, shape_list = level(['##..', '##..', '....', '....'], [(Square, 1), (RightEll, 2)])
+        self.assertEqual(solve.count_solutions(board, shape_list, unique=True), 2)
+
+    def test_unique_chiral(self):
+        # Reflecting either tiling needs a RightZed and RightElls, but the
+        # two are still a rotation of each other
+        level_rows = ['.....'] * 4
+        pieces = [(Rectangle, 1), (LeftZed, 1), (Square, 1), (LeftEll, 2)]
+        board, shape_list = level(level_rows, pieces)
+        self.assertEqual(solve.count_solutions(board, shape_list), 2)
+        board, shape_list = level(level_rows, pieces)
+        self.assertEqual(solve.count_solutions(board, shape_list, unique=True), 1)
+        for engine, workers in (('dlx', None), ('backtrack', 2)):
+            board, shape_list = level(level_rows, pieces)
+            solutions = solve.solve_level(board, shape_list, engine, all_solutions=True, workers=workers, unique=True)
+            self.assertEqual(len(list(solutions)), 1, engine)
+
+    def test_progress(self):
+        calls = []
+        board, shape_list = level(['....'] * 2, [(Square, 2)])
+        list(solve.iter_solutions(board, shape_list, progress=lambda nodes, rate: calls.append(nodes)))
+        # Called once more at the end of the search
+        self.assertEqual(calls, [3])
+
+
+class DlxTest(unittest.TestCase):
+
+    def test_stock(self):
+        board, shape_list = level(['........'] * 7, STOCK_PIECES)
+        self.assertEqual(rows(dlx.solve(board, shape_list, 7, 8)), STOCK)
+
+    def test_blocked(self):
+        found = dlx_all(['##..', '##..', '....', '....'], [(Square, 1), (RightEll, 2)])
+        self.assertEqual(sorted(found), [
+            ['##AA', '##AA', 'BBBC', 'BCCC'],
+            ['##BB', '##CB', 'AACB', 'AACC'],
+        ])
+
+    def test_agrees_with_backtrack(self):
+        for level_rows, pieces in LEVELS:
+            found = dlx_all(level_rows, pieces)
+            b = backtrack(level_rows, pieces)
+            if b:
+                self.assertIn(rows(b), found, level_rows)
+            else:
+                self.assertEqual(found, [], level_rows)
+
+    def test_identical_pieces(self):
+        # Swapping two of the Tees is not a new solution
+        found = dlx_all(['....'] * 4, [(Tee, 4)])
+        self.assertEqual(len(found), 2)
+
+
+class ParallelTest(unittest.TestCase):
+
+    def test_engines_agree(self):
+        for level_rows, pieces in LEVELS:
+            found = sorted(dlx_all(level_rows, pieces))
+            self.assertEqual(sorted(backtrack_all(level_rows, pieces)), found, level_rows)
+            self.assertEqual(sorted(parallel_all(level_rows, pieces)), found, level_rows)
+
+    def test_workers_need_backtrack(self):
+        board, shape_list = level(['....'] * 4, [(Tee, 4)])
+        for all_solutions in (False, True):
+            with self.assertRaises(ValueError):
+                solve.solve_level(board, shape_list, 'dlx', all_solutions, workers=2)
+
+    def test_first_solution(self):
+        for level_rows, pieces in LEVELS:
+            board, shape_list = level(level_rows, pieces)
+            b = solve_parallel(board, shape_list, 2)
+            found = dlx_all(level_rows, pieces)
+            if found:
+                self.assertIn(rows(b), found, level_rows)
+            else:
+                self.assertFalse(b, level_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
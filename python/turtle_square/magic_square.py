@@ -1,36 +1,65 @@
-NAME_INDEX = {'name': 0}
+"""
+Edge matching puzzles like the 3x3 Turtle square: lay out square cards on an
+N x N board so that every pair of touching edges match.
 
+Puzzles other than the Turtle square are read from JSON files, one puzzle
+per file (or a list of them) or one per line in a .jsonl file:
 
-class Card(object):
+    {"id": "turtle", "size": 3,
+     "matches": [["rb", "rh"], ["gb", "gh"], ["bb", "bh"], ["yb", "yh"]],
+     "cards": [["rb", "bb", "rh", "gh"], ...]}
+
+Cards list their edges clockwise from the top, and each pair of `matches`
+fits together either way round ([x, x] for an edge that matches itself). A
+puzzle that isn't well formed is reported and the others are still solved.
+
+    python magic_square.py puzzles.jsonl --order constrained --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice, product
 
-    def __init__(self, t1, t2, t3, t4):
-        self._original_pos = [t1, t2, t3, t4]
 
-        self._curr_pos = [t1, t2, t3, t4]
-        self.name = NAME_INDEX['name']
-        NAME_INDEX['name'] += 1
+class Rotation(object):
+    """
+    A card turned a number of times, with the edges that end up on each side.
+    Rotations are made once per card by Card.rotation() and never change, so
+    solvers in different threads or processes can share them.
+    """
+    __slots__ = ('card', 'turns', 'top', 'right', 'bottom', 'left')
 
-    def rotate(self, numtimes):
-        self._curr_pos = self._original_pos[numtimes:] + self._original_pos[:numtimes]
+    def __init__(self, card, turns, top, right, bottom, left):
+        for name, value in zip(self.__slots__, (card, turns, top, right, bottom, left)):
+            object.__setattr__(self, name, value)
 
-    def reset(self):
-        self._curr_pos = self._original_pos
+    def __setattr__(self, name, value):
+        raise AttributeError('rotations can not be changed')
 
-    @property
-    def top(self):
-        return self._curr_pos[0]
+    def __reduce__(self):
+        return Rotation, (self.card, self.turns, self.top, self.right, self.bottom, self.left)
 
-    @property
-    def right(self):
-        return self._curr_pos[1]
+    def __repr__(self):
+        return 'Rotation({}, {})'.format(self.card, self.turns)
 
-    @property
-    def bottom(self):
-        return self._curr_pos[2]
 
-    @property
-    def left(self):
-        return self._curr_pos[3]
+class Card(object):
+    __slots__ = ('edges',)
+
+    def __init__(self, t1, t2, t3, t4):
+        self.edges = (t1, t2, t3, t4)
+
+    def rotation(self, idx, turns):
+        """
+        Returns this card, number `idx` in the deck, turned `turns` times:
+        the edge that was on the right is on top after one turn.
+        """
+        edges = self.edges[turns:] + self.edges[:turns]
+        return Rotation(idx, turns, *edges)
 
 
 rb = 'rb'
@@ -54,7 +83,7 @@ MATCHES = {
     yb: yh,
 }
 
-CARDS = [
+CARDS = (
     Card(rb, bb, rh, gh),
     Card(rb, bb, yh, gh),
     Card(rb, gb, yh, bh),
@@ -64,82 +93,12 @@ CARDS = [
     Card(rb, yb, gh, bh),
     Card(yb, rb, bh, gh),
     Card(yb, rb, yh, bh),
-]
-
-
-BOARD = [
-    [None, None, None],
-    [None, None, None],
-    [None, None, None],
-]
-
-
-def matches_up(row, col):
-    if row == 0:
-        return True
-
-    above = BOARD[row - 1][col]
-    card = BOARD[row][col]
-    return above.bottom == MATCHES[card.top]
-
-
-def matches_down(row, col):
-    if row == len(BOARD) - 1:
-        return True
-
-    below = BOARD[row + 1][col]
-    card = BOARD[row][col]
-
-    if not below:
-        return True
-
-    return below.top == MATCHES[card.bottom]
-
-
-def matches_left(row, col):
-    if col == 0:
-        return True
-
-    left = BOARD[row][col - 1]
-    card = BOARD[row][col]
+)
 
-    return card.left == MATCHES[left.right]
 
-
-def matches_right(row, col):
-    if col == len(BOARD[0]) - 1:
-        return True
-
-    card = BOARD[row][col]
-    right = BOARD[row][col + 1]
-    if not right:
-        return True
-    return card.right == MATCHES[right.left]
-
-
-def fits(row, col):
-    if not BOARD[row][col]:
-        return False
-    mup = matches_up(row, col)
-    mdo = matches_down(row, col)
-    mri = matches_right(row, col)
-    mle = matches_left(row, col)
-    return mup and mdo and mri and mle
-
-
-def check_board():
-    for i in range(len(BOARD)):
-        for j in range(len(BOARD[0])):
-            if not fits(i, j):
-                return False
-
-    print_board()
-    return True
-
-
-def print_board():
+def print_board(board):
     print('Solution:')
-    for row in BOARD:
+    for row in board:
         row_top_str = ''
         row_mid_str = ''
         row_bot_str = ''
@@ -153,44 +112,541 @@ def print_board():
     print('======================\n')
 
 
-NOT_PRINTED = {'val': 3}
-
-
-def solve(cards, row, col):
-
-    if row == len(BOARD) and col == len(BOARD[0]):
-        assert len(cards) == 0
-
-    if not cards:
-        if check_board():
-            return True
-
-    if row >= len(BOARD):
-        return False
-
-    for idx in range(len(cards)):
-        card = cards[idx]
-
-        remain = cards[:idx] + cards[idx + 1:]
-        BOARD[row][col] = card
+ORDERS = ('row', 'constrained')
+NO_EDGES = (None, None, None, None)
+# How many nodes search() visits between looks at its stop event
+STOP_CHECK = 1024
+
+
+class SquareSolver(object):
+    """
+    Finds every way of laying out `cards` on a size x size board so that each
+    pair of touching edges matches (see MATCHES).
+
+    With order 'row' cells are filled in row major order; with 'constrained'
+    the next cell is always the empty one with the fewest cards left that
+    fit its neighbours, which finds dead ends much sooner on bigger boards.
+
+    With `unique`, only one solution of each set that are the same layout
+    turned around or with identical cards swapped is searched for: identical
+    cards (the same edges, maybe turned) become one card with a count, and
+    the first card with four different rotations is only tried unturned.
+    expand() gives back the full set of solutions.
+
+    The rotation table and edge index are built once and only read while
+    solving; the board and the cards left belong to the solver, so separate
+    solvers can run in parallel threads or processes. A single solver runs
+    one search at a time, and gives up early if its `stop` event is set.
+    """
+
+    def __init__(self, cards=CARDS, size=3, matches=MATCHES, order='row', unique=False):
+        if len(cards) != size * size:
+            raise ValueError('a {0}x{0} board needs {1} cards, got {2}'.format(size, size * size, len(cards)))
+        if order not in ORDERS:
+            raise ValueError('order must be one of {}, got {}'.format(', '.join(ORDERS), order))
+
+        self.size = size
+        self.matches = matches
+        self.order = order
+        self.unique = unique
+        self.rotations = tuple(
+            tuple(card.rotation(idx, turns) for turns in range(4))
+            for idx, card in enumerate(cards)
+        )
+
+        # How many of each card are left; with `unique`, identical cards are
+        # counted on the first of them
+        self.left = [1] * len(cards)
+        self.anchor = None
+        if unique:
+            first = {}
+            for idx, rotations in enumerate(self.rotations):
+                key = min(edges(r) for r in rotations)
+                if key in first:
+                    self.left[first[key]] += 1
+                    self.left[idx] = 0
+                else:
+                    first[key] = idx
+
+            for idx, rotations in enumerate(self.rotations):
+                if self.left[idx] == 1 and len(set(edges(r) for r in rotations)) == 4:
+                    self.anchor = idx
+                    break
+
+        self.index = self.build_index()
+        self.board = [[None] * size for _ in range(size)]
+        self.cells = [divmod(pos, size) for pos in range(size * size)]
+        self.stop = None
+        self.stopped = False
+        self.nodes = 0
+
+    def build_index(self):
+        """
+        Returns {(top, right, bottom, left): (rotation, ...)} listing, for
+        the edge values a cell can require of its sides, the card rotations
+        that have them. None stands for no requirement (a board edge or an
+        empty neighbour), so every rotation is listed under all 16 ways of
+        leaving some of its sides out. Candidates are kept in card then
+        rotation order.
+
+        With `unique`, cards counted on another card are left out, a card
+        only has one of the rotations with the same edges and the anchor
+        card is only listed unturned.
+        """
+        index = {}
+        for idx, rotations in enumerate(self.rotations):
+            if not self.left[idx]:
+                continue
 
-        next_row = row
-        next_col = col + 1
-        if next_col == len(BOARD[0]):
-            next_row += 1
-            next_col = 0
+            if self.unique:
+                seen = set()
+                distinct = []
+                for r in rotations[:1] if idx == self.anchor else rotations:
+                    if edges(r) not in seen:
+                        seen.add(edges(r))
+                        distinct.append(r)
+                rotations = distinct
+
+            for r in rotations:
+                for key in product((r.top, None), (r.right, None), (r.bottom, None), (r.left, None)):
+                    index.setdefault(key, []).append(r)
+
+        return {key: tuple(value) for key, value in index.items()}
+
+    def required(self, row, col):
+        # The (top, right, bottom, left) edges the neighbours of a cell ask for
+        board = self.board
+        last = self.size - 1
+        above = board[row - 1][col] if row else None
+        right = board[row][col + 1] if col < last else None
+        below = board[row + 1][col] if row < last else None
+        left = board[row][col - 1] if col else None
+        return (
+            self.matches[above.bottom] if above else None,
+            self.matches[right.left] if right else None,
+            self.matches[below.top] if below else None,
+            self.matches[left.right] if left else None,
+        )
+
+    def fits(self, row, col):
+        card = self.board[row][col]
+        if not card:
+            return False
+
+        top, right, bottom, left = self.required(row, col)
+        return (
+            top in (None, card.top)
+            and right in (None, card.right)
+            and bottom in (None, card.bottom)
+            and left in (None, card.left)
+        )
+
+    def check_board(self):
+        for i in range(self.size):
+            for j in range(self.size):
+                if not self.fits(i, j):
+                    return False
 
-        for i in range(4):
-            card.rotate(i)
+        return True
 
-            if not fits(row, col):
+    def next_cell(self, placed):
+        """
+        Returns (row, col, candidates) for the cell to fill after `placed`
+        cards, where candidates are the rotations that fit its neighbours,
+        used cards included.
+        """
+        if self.order == 'row':
+            for row, col in self.cells[placed:]:
+                if not self.board[row][col]:
+                    return row, col, self.index.get(self.required(row, col), ())
+
+        # Cells with no card next to them can take any card, so only the
+        # ones next to a card are counted
+        best = None
+        best_count = None
+        left = self.left
+        for row, col in self.cells:
+            if self.board[row][col]:
                 continue
 
-            solve(remain, next_row, next_col)
-
-    BOARD[row][col] = None
+            need = self.required(row, col)
+            if need == NO_EDGES:
+                continue
 
-    return False
+            candidates = self.index.get(need, ())
+            count = 0
+            for r in candidates:
+                if left[r.card]:
+                    count += 1
+                    if best_count is not None and count >= best_count:
+                        break
+
+            if best_count is None or count < best_count:
+                if not count:
+                    return row, col, ()
+                best = row, col, candidates
+                best_count = count
+
+        if best is None:
+            row, col = divmod(placed, self.size)
+            best = row, col, self.index[NO_EDGES]
+
+        return best
+
+    def snapshot(self):
+        return tuple(tuple(row) for row in self.board)
+
+    def first_choices(self):
+        """
+        Returns the (row, col, rotation) choices the search starts with:
+        every rotation that can go on the first cell, or with `unique` and
+        'constrained' order the anchor card, unturned, on every cell, so the
+        rest of the search starts next to a card it has to match.
+        """
+        if self.anchor is not None and self.order == 'constrained':
+            anchor = self.rotations[self.anchor][0]
+            return [(row, col, anchor) for row, col in self.cells]
+
+        row, col, candidates = self.next_cell(0)
+        return [(row, col, r) for r in candidates]
+
+    def search(self, placed=0):
+        """
+        Yields a snapshot of the board for every solution, going on from the
+        `placed` cards already on it. Cards are taken back off the board even
+        if the caller stops iterating early.
+        """
+        if placed == self.size * self.size:
+            if self.check_board():
+                yield self.snapshot()
+            return
+
+        if self.stopped:
+            return
+
+        # Checking the event takes a lock shared between processes, so it is
+        # only done every STOP_CHECK nodes
+        self.nodes += 1
+        if self.stop is not None and not self.nodes % STOP_CHECK and self.stop.is_set():
+            self.stopped = True
+            return
+
+        board = self.board
+        if not placed:
+            for row, col, r in self.first_choices():
+                board[row][col] = r
+                self.left[r.card] -= 1
+                try:
+                    yield from self.search(1)
+                finally:
+                    self.left[r.card] += 1
+                    board[row][col] = None
+            return
+
+        row, col, candidates = self.next_cell(placed)
+        for r in candidates:
+            if not self.left[r.card]:
+                continue
 
+            board[row][col] = r
+            self.left[r.card] -= 1
+            try:
+                yield from self.search(placed + 1)
+            finally:
+                self.left[r.card] += 1
+                board[row][col] = None
+
+    def turned(self, board):
+        # `board` turned a quarter clockwise, every card turned with it
+        last = self.size - 1
+        return tuple(
+            tuple(
+                self.rotations[board[last - col][row].card][(board[last - col][row].turns + 3) % 4]
+                for col in range(self.size)
+            )
+            for row in range(self.size)
+        )
+
+    def expand(self, solutions):
+        """
+        Yields every solution the plain search would find for each of
+        `solutions` found with `unique`: the board turned all four ways,
+        identical cards swapped around and symmetric cards in each of their
+        rotations that look the same. They come out in the order the plain
+        search in row order finds them.
+        """
+        groups = {}
+        for idx, rotations in enumerate(self.rotations):
+            groups.setdefault(min(edges(r) for r in rotations), []).append(idx)
+        twins = {idx: ids for ids in groups.values() for idx in ids}
+
+        found = set()
+        for solution in solutions:
+            boards = [solution]
+            for _ in range(3):
+                boards.append(self.turned(boards[-1]))
+
+            for board in boards:
+                cells = [r for row in board for r in row]
+                # Each cell can take any of the cards identical to its card,
+                # turned any way that gives the same edges
+                options = []
+                for r in cells:
+                    options.append([
+                        (idx, turns)
+                        for idx in twins[r.card]
+                        for turns in range(4)
+                        if edges(self.rotations[idx][turns]) == edges(r)
+                    ])
+
+                for layout in product(*options):
+                    if len(set(idx for idx, _ in layout)) == len(layout):
+                        found.add(layout)
+
+        for layout in sorted(found):
+            yield tuple(
+                tuple(self.rotations[idx][turns] for idx, turns in layout[row * self.size:(row + 1) * self.size])
+                for row in range(self.size)
+            )
+
+    def solve(self, limit=None, expand=False):
+        """
+        Yields every solution as a tuple of (card index, rotation) pairs, one
+        per cell in row major order (see board_of()). The search stops after
+        `limit` solutions, or as soon as the caller stops asking for more.
+        With `expand`, the solutions of a `unique` search are expanded back
+        to the full set first.
+        """
+        self.stopped = False
+        solutions = self.search()
+        if expand:
+            solutions = self.expand(solutions)
+
+        for board in islice(solutions, limit):
+            yield layout(board)
+
+    def board_of(self, solution):
+        # The board of Rotations for a solution from solve(), for print_board()
+        cells = [self.rotations[idx][turns] for idx, turns in solution]
+        return [cells[row * self.size:(row + 1) * self.size] for row in range(self.size)]
+
+
+def edges(rotation):
+    return rotation.top, rotation.right, rotation.bottom, rotation.left
+
+
+def layout(board):
+    return tuple((r.card, r.turns) for row in board for r in row)
+
+
+# Set in each worker by init_worker()
+stop = None
+
+
+def init_worker(event):
+    global stop
+    stop = event
+
+
+def solve_branch(solver, row, col, rotation, limit=None):
+    """
+    Worker entry point: the solutions with `rotation` on (row, col), at most
+    `limit` of them, or the ones found before the shared stop event is set.
+    """
+    solver.stop = stop
+    solver.board[row][col] = rotation
+    solver.left[rotation.card] -= 1
+    return list(islice(solver.search(1), limit))
+
+
+def solve_parallel(solver, workers=None, limit=None, expand=False):
+    """
+    Same as solver.solve(limit, expand), but each of the solver's
+    first_choices() is searched in a separate process of a pool of `workers`
+    (all cores by default). Solutions come in the order solve() gives them.
+    Once `limit` are found, or the caller stops asking for more, a shared
+    event stops the branches still running and the rest are dropped.
+    """
+    workers = workers or os.cpu_count()
+    # Expanding needs every canonical solution before it can sort them
+    branch_limit = None if expand else limit
+    event = multiprocessing.Event()
+    pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(event,))
+    try:
+        futures = [
+            pool.submit(solve_branch, solver, row, col, r, branch_limit)
+            for row, col, r in solver.first_choices()
+        ]
+        solutions = (board for future in futures for board in future.result())
+        if expand:
+            solutions = solver.expand(solutions)
+
+        for count, board in enumerate(islice(solutions, limit), 1):
+            if count == limit:
+                # Nothing more is needed from the branches still running
+                event.set()
+            yield layout(board)
+    finally:
+        event.set()
+        pool.shutdown(cancel_futures=True)
+
+
+def write_jsonl(puzzle_id, solutions, out):
+    """
+    Writes one JSON line per solution from solve(), flushed as it comes:
+
+        {"id": "turtle", "solution": [[3, 1], [0, 2], ...]}
+    """
+    count = 0
+    for solution in solutions:
+        out.write(json.dumps({'id': puzzle_id, 'solution': [list(cell) for cell in solution]}) + '\n')
+        out.flush()
+        count += 1
+
+    return count
+
+
+def parse_puzzle(puzzle):
+    """
+    Returns the SquareSolver keyword arguments for a JSON puzzle, raising
+    ValueError if it is not one.
+    """
+    if not isinstance(puzzle, dict):
+        raise ValueError('a puzzle must be a JSON object, got {!r}'.format(puzzle))
+    for key in ('size', 'matches', 'cards'):
+        if key not in puzzle:
+            raise ValueError('puzzle has no {!r}'.format(key))
+
+    size = puzzle['size']
+    if not isinstance(size, int) or isinstance(size, bool) or size < 1:
+        raise ValueError("'size' must be a positive whole number, got {!r}".format(size))
+
+    matches = {}
+    if not isinstance(puzzle['matches'], list):
+        raise ValueError("'matches' must be a list of pairs of edges")
+    for pair in puzzle['matches']:
+        if not isinstance(pair, list) or len(pair) != 2 or not all(isinstance(e, str) for e in pair):
+            raise ValueError('matches are pairs of edges, got {!r}'.format(pair))
+        a, b = pair
+        matches[a] = b
+        matches[b] = a
+
+    if not isinstance(puzzle['cards'], list):
+        raise ValueError("'cards' must be a list of cards")
+    if len(puzzle['cards']) != size * size:
+        raise ValueError('a {0}x{0} board needs {1} cards, got {2}'.format(size, size * size, len(puzzle['cards'])))
+
+    cards = []
+    for edges in puzzle['cards']:
+        if not isinstance(edges, list) or len(edges) != 4:
+            raise ValueError('cards have 4 edges, got {!r}'.format(edges))
+        for edge in edges:
+            if not isinstance(edge, str) or edge not in matches:
+                raise ValueError('edge {!r} does not match anything'.format(edge))
+        cards.append(Card(*edges))
+
+    return {'cards': cards, 'size': size, 'matches': matches}
+
+
+def parse_puzzle_line(line):
+    try:
+        puzzle = json.loads(line)
+    except ValueError as e:
+        raise ValueError('not valid JSON: {}'.format(e))
+
+    return parse_puzzle(puzzle)
+
+
+def unreadable(message):
+    raise ValueError(message)
+
+
+def json_id(puzzle, idx):
+    if isinstance(puzzle, dict) and 'id' in puzzle:
+        return str(puzzle['id'])
+    return str(idx)
+
+
+def read_puzzles(path):
+    """
+    Yields (id, read) for every puzzle in a .json or .jsonl file, where
+    read() returns the puzzle's SquareSolver keyword arguments. read()
+    raises ValueError for a puzzle that is not well formed, so the others
+    can still be solved. A file that can't be read, or a .json file that
+    isn't valid JSON, gives a single puzzle with the path as its id.
+    """
+    try:
+        with open(path) as f:
+            text = f.read()
+    except (OSError, ValueError) as e:
+        yield path, partial(unreadable, 'can not read file: {}'.format(e))
+        return
+
+    if path.endswith('.jsonl'):
+        for idx, line in enumerate(text.split('\n')):
+            if not line.strip():
+                continue
 
-solve(CARDS, 0, 0)
+            try:
+                puzzle = json.loads(line)
+            except ValueError:
+                yield str(idx), partial(parse_puzzle_line, line)
+            else:
+                yield json_id(puzzle, idx), partial(parse_puzzle, puzzle)
+        return
+
+    try:
+        puzzles = json.loads(text)
+    except ValueError as e:
+        yield path, partial(unreadable, 'not valid JSON: {}'.format(e))
+        return
+
+    if isinstance(puzzles, dict):
+        puzzles = [puzzles]
+    if not isinstance(puzzles, list):
+        yield path, partial(unreadable, 'expected a puzzle or a list of puzzles, got {!r}'.format(puzzles))
+        return
+
+    for idx, puzzle in enumerate(puzzles):
+        yield json_id(puzzle, idx), partial(parse_puzzle, puzzle)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('puzzles', nargs='*', help='.json or .jsonl puzzle files, the Turtle square if none')
+    parser.add_argument('--order', choices=ORDERS, default='row', help='which empty cell to fill next')
+    parser.add_argument('--workers', type=int, help='search the choices for the first cell across this many processes')
+    parser.add_argument('--unique', action='store_true', help='only find one of the solutions that are the same turned around or with identical cards swapped')
+    parser.add_argument('--expand', action='store_true', help='with --unique, print the full set of solutions again')
+    parser.add_argument('--limit', type=int, help='stop after this many solutions per puzzle')
+    parser.add_argument('--json', action='store_true', help='write a JSON line of (card, rotation) pairs per solution instead of drawing it')
+    args = parser.parse_args()
+
+    puzzles = [('turtle', dict)]
+    if args.puzzles:
+        puzzles = (p for path in args.puzzles for p in read_puzzles(path))
+
+    for puzzle_id, read in puzzles:
+        try:
+            solver = SquareSolver(order=args.order, unique=args.unique, **read())
+        except ValueError as e:
+            print(json.dumps({'id': puzzle_id, 'error': str(e)}) if args.json else '{}: {}'.format(puzzle_id, e))
+            continue
+
+        expand = args.unique and args.expand
+        if args.workers:
+            solutions = solve_parallel(solver, args.workers, args.limit, expand)
+        else:
+            solutions = solver.solve(args.limit, expand)
+
+        if args.json:
+            write_jsonl(puzzle_id, solutions, sys.stdout)
+            continue
+
+        count = 0
+        for solution in solutions:
+            print_board(solver.board_of(solution))
+            count += 1
+
+        if args.puzzles:
+            print('{}: {} solutions'.format(puzzle_id, count))
@@ -0,0 +1,289 @@
+import io
+import json
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+import magic_square
+from magic_square import Card, SquareSolver, read_puzzles, solve_parallel, write_jsonl
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CARDS = [
+    ('rb', 'bb', 'rh', 'gh'),
+    ('rb', 'bb', 'yh', 'gh'),
+    ('rb', 'gb', 'yh', 'bh'),
+    ('yb', 'bb', 'gh', 'rh'),
+    ('yb', 'gb', 'rh', 'bh'),
+    ('yb', 'gb', 'rh', 'bh'),
+    ('rb', 'yb', 'gh', 'bh'),
+    ('yb', 'rb', 'bh', 'gh'),
+    ('yb', 'rb', 'yh', 'bh'),
+]
+
+# The Turtle square's solutions as (card, turns) per cell in row major
+# order, in the order the original search printed them
+TURTLE = [
+    ((4, 0), (0, 0), (8, 0), (2, 0), (1, 0), (5, 0), (7, 0), (3, 0), (6, 0)),
+    ((5, 0), (0, 0), (8, 0), (2, 0), (1, 0), (4, 0), (7, 0), (3, 0), (6, 0)),
+    ((6, 2), (3, 2), (7, 2), (4, 2), (1, 2), (2, 2), (8, 2), (0, 2), (5, 2)),
+    ((6, 2), (3, 2), (7, 2), (5, 2), (1, 2), (2, 2), (8, 2), (0, 2), (4, 2)),
+    ((7, 3), (2, 3), (4, 3), (3, 3), (1, 3), (0, 3), (6, 3), (5, 3), (8, 3)),
+    ((7, 3), (2, 3), (5, 3), (3, 3), (1, 3), (0, 3), (6, 3), (4, 3), (8, 3)),
+    ((8, 1), (4, 1), (6, 1), (0, 1), (1, 1), (3, 1), (5, 1), (2, 1), (7, 1)),
+    ((8, 1), (5, 1), (6, 1), (0, 1), (1, 1), (3, 1), (4, 1), (2, 1), (7, 1)),
+]
+
+# 'x' matches itself, every letter its upper case
+MATCHES = {'x': 'x'}
+for c in 'abcdefgh':
+    MATCHES[c] = c.upper()
+    MATCHES[c.upper()] = c
+
+
+def turned(card, turns):
+    return card[turns:] + card[:turns]
+
+
+def printed_edges(solution):
+    # The (top, right, bottom, left) edges of every cell of a solution
+    return [turned(CARDS[card], turns) for card, turns in solution]
+
+
+def parse_boards(text):
+    """
+    Returns the boards drawn by print_board() as lists of the (top, right,
+    bottom, left) edges of every cell.
+    """
+    boards = []
+    lines = text.splitlines()
+    for idx, line in enumerate(lines):
+        if line != 'Solution:':
+            continue
+
+        cells = []
+        for row in range(3):
+            top, middle, bottom = lines[idx + 1 + 3 * row:idx + 4 + 3 * row]
+            for col in range(3):
+                # Every card is drawn 6 characters wide, 2 per edge
+                cell = slice(6 * col, 6 * col + 6)
+                cells.append((top[cell].strip(), middle[cell][4:], bottom[cell].strip(), middle[cell][:2]))
+        boards.append(cells)
+
+    return boards
+
+
+def random_puzzle(seed, size, values):
+    """
+    Returns the cards of a size x size puzzle with at least one solution, cut
+    out of a random board whose inner edges are taken from `values`. The
+    cards are turned and shuffled, and the board's outer edges are all 'x'.
+    """
+    rnd = random.Random(seed)
+    across = [[rnd.choice(values) for _ in range(size - 1)] for _ in range(size)]
+    down = [[rnd.choice(values) for _ in range(size)] for _ in range(size - 1)]
+    cards = []
+    for row in range(size):
+        for col in range(size):
+            edges = (
+                MATCHES[down[row - 1][col]] if row else 'x',
+                across[row][col] if col < size - 1 else 'x',
+                down[row][col] if row < size - 1 else 'x',
+                MATCHES[across[row][col - 1]] if col else 'x',
+            )
+            cards.append(turned(edges, rnd.randrange(4)))
+
+    rnd.shuffle(cards)
+    return [Card(*edges) for edges in cards]
+
+
+def layouts(boards):
+    return [tuple((r.card, r.turns) for row in board for r in row) for board in boards]
+
+
+class MagicSquareTest(unittest.TestCase):
+
+    def test_turtle(self):
+        out = subprocess.run(
+            [sys.executable, 'magic_square.py'], cwd=HERE, check=True, capture_output=True, text=True,
+        ).stdout
+        self.assertEqual(parse_boards(out), [printed_edges(s) for s in TURTLE])
+
+    def test_solver(self):
+        solver = SquareSolver()
+        for _ in range(2):
+            self.assertEqual(list(solver.solve()), TURTLE)
+
+        # Nothing is left on the board for the next search
+        self.assertEqual(solver.board, [[None] * 3 for _ in range(3)])
+        self.assertEqual(solver.left, [1] * 9)
+
+        board = solver.board_of(TURTLE[0])
+        self.assertEqual([edges for row in board for edges in map(magic_square.edges, row)], printed_edges(TURTLE[0]))
+
+    def test_limit(self):
+        solver = SquareSolver()
+        self.assertEqual(list(solver.solve(limit=3)), TURTLE[:3])
+        self.assertEqual(list(solver.solve(limit=0)), [])
+        # Stopping early leaves the board as it was too
+        solutions = solver.solve()
+        next(solutions)
+        solutions.close()
+        self.assertEqual(list(solver.solve(limit=20)), TURTLE)
+
+        solver = SquareSolver(unique=True)
+        self.assertEqual(list(solver.solve(limit=5, expand=True)), TURTLE[:5])
+
+    def test_rotation(self):
+        r = magic_square.CARDS[0].rotation(0, 1)
+        self.assertEqual((r.card, r.turns, r.top, r.right, r.bottom, r.left), (0, 1, 'bb', 'rh', 'gh', 'rb'))
+        with self.assertRaises(AttributeError):
+            r.top = 'rb'
+
+        copy = pickle.loads(pickle.dumps(r))
+        self.assertEqual((copy.card, copy.turns, copy.top, copy.left), (0, 1, 'bb', 'rb'))
+
+    def test_orders(self):
+        self.assertEqual(layouts(SquareSolver().search()), TURTLE)
+        self.assertEqual(sorted(layouts(SquareSolver(order='constrained').search())), TURTLE)
+
+        for size, values in ((2, 'aAx'), (3, 'abcABC'), (4, 'abcdefABCDEF')):
+            cards = random_puzzle(0, size, values)
+            row = layouts(SquareSolver(cards, size, MATCHES).search())
+            self.assertTrue(row, size)
+            self.assertEqual(sorted(layouts(SquareSolver(cards, size, MATCHES, order='constrained').search())), sorted(row))
+
+    def test_unique(self):
+        # Every solution is one of the others turned, or with the two
+        # identical cards swapped
+        for order in ('row', 'constrained'):
+            solver = SquareSolver(order=order, unique=True)
+            canonical = list(solver.search())
+            self.assertEqual(len(canonical), 1)
+            self.assertEqual(layouts(solver.expand(canonical)), TURTLE)
+
+    def test_unique_expand(self):
+        duplicates = symmetric = False
+        for size, values in ((2, 'aAx'), (3, 'abcABC')):
+            for seed in range(4):
+                cards = random_puzzle(seed, size, values)
+                shapes = [min(turned(c.edges, t) for t in range(4)) for c in cards]
+                duplicates = duplicates or len(set(shapes)) < len(shapes)
+                symmetric = symmetric or any(c.edges == turned(c.edges, 2) for c in cards)
+
+                plain = layouts(SquareSolver(cards, size, MATCHES).search())
+                for order in ('row', 'constrained'):
+                    solver = SquareSolver(cards, size, MATCHES, order=order, unique=True)
+                    self.assertEqual(layouts(solver.expand(solver.search())), plain, (size, seed, order))
+
+        # The puzzles have what --unique leaves out
+        self.assertTrue(duplicates)
+        self.assertTrue(symmetric)
+
+    def test_solver_errors(self):
+        with self.assertRaises(ValueError):
+            SquareSolver(size=4)
+        with self.assertRaises(ValueError):
+            SquareSolver(order='spiral')
+
+    def test_stop(self):
+        cards = random_puzzle(0, 3, 'abcABC')
+        solutions = list(SquareSolver(cards, 3, MATCHES).solve())
+        solver = SquareSolver(cards, 3, MATCHES)
+        solver.stop = threading.Event()
+        solver.stop.set()
+        # The event is only looked at every STOP_CHECK nodes
+        found = list(solver.solve())
+        self.assertEqual(found, solutions[:len(found)])
+        self.assertLess(len(found), len(solutions))
+        self.assertEqual(solver.nodes, magic_square.STOP_CHECK)
+        self.assertEqual(solver.board, [[None] * 3 for _ in range(3)])
+        self.assertEqual(solver.left, [1] * 9)
+
+    def test_solve_parallel(self):
+        for order in ('row', 'constrained'):
+            solutions = list(SquareSolver(order=order).solve())
+            self.assertEqual(list(solve_parallel(SquareSolver(order=order), 2)), solutions)
+            self.assertEqual(list(solve_parallel(SquareSolver(order=order), 2, limit=3)), solutions[:3])
+            solver = SquareSolver(order=order, unique=True)
+            self.assertEqual(list(solve_parallel(solver, 2, limit=5, expand=True)), solutions[:5])
+
+    def test_write_jsonl(self):
+        out = io.StringIO()
+        self.assertEqual(write_jsonl('turtle', SquareSolver().solve(limit=2), out), 2)
+        self.assertEqual(out.getvalue(), (
+            '{"id": "turtle", "solution": [[4, 0], [0, 0], [8, 0], [2, 0], [1, 0], [5, 0], [7, 0], [3, 0], [6, 0]]}\n'
+            '{"id": "turtle", "solution": [[5, 0], [0, 0], [8, 0], [2, 0], [1, 0], [4, 0], [7, 0], [3, 0], [6, 0]]}\n'
+        ))
+
+    def write(self, name, text):
+        path = os.path.join(tempfile.mkdtemp(), name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_read_puzzles(self):
+        puzzle = {'id': 'p', 'size': 2, 'matches': [['a', 'A'], ['x', 'x']], 'cards': [['x', 'a', 'A', 'x']] * 4}
+        path = self.write('puzzles.jsonl', json.dumps(puzzle) + '\n\n' + json.dumps(dict(puzzle, id='q')) + '\n')
+
+        puzzles = list(read_puzzles(path))
+        self.assertEqual([puzzle_id for puzzle_id, _ in puzzles], ['p', 'q'])
+        kwargs = puzzles[0][1]()
+        self.assertEqual(kwargs['size'], 2)
+        self.assertEqual(kwargs['matches'], {'a': 'A', 'A': 'a', 'x': 'x'})
+        self.assertEqual([c.edges for c in kwargs['cards']], [('x', 'a', 'A', 'x')] * 4)
+
+    def test_read_puzzles_errors(self):
+        puzzle = {'size': 2, 'matches': [['a', 'A'], ['x', 'x']], 'cards': [['x', 'a', 'A', 'x']] * 4}
+        bad = [
+            [1, 2],
+            {'matches': puzzle['matches'], 'cards': puzzle['cards']},
+            dict(puzzle, size='2'),
+            dict(puzzle, matches=[['a', 'A', 'x']]),
+            dict(puzzle, cards='xaAx'),
+            dict(puzzle, cards=puzzle['cards'][:3]),
+            dict(puzzle, cards=[['x', 'a', 'A']] * 4),
+            dict(puzzle, cards=[['x', 'a', 'A', 'b']] * 4),
+        ]
+        path = self.write('puzzles.json', json.dumps(bad + [puzzle]))
+        puzzles = list(read_puzzles(path))
+        self.assertEqual([puzzle_id for puzzle_id, _ in puzzles], [str(idx) for idx in range(len(bad) + 1)])
+        for puzzle_id, read in puzzles[:-1]:
+            with self.assertRaises(ValueError, msg=puzzle_id):
+                read()
+        self.assertEqual(puzzles[-1][1]()['size'], 2)
+
+        path = self.write('puzzles.jsonl', '{"id": "a",\n' + json.dumps(dict(puzzle, id='b')))
+        puzzles = list(read_puzzles(path))
+        self.assertEqual([puzzle_id for puzzle_id, _ in puzzles], ['0', 'b'])
+        with self.assertRaises(ValueError):
+            puzzles[0][1]()
+
+        for path in (os.path.join(tempfile.mkdtemp(), 'missing.json'), self.write('bad.json', '[{'), self.write('number.json', '4')):
+            puzzles = list(read_puzzles(path))
+            self.assertEqual([puzzle_id for puzzle_id, _ in puzzles], [path])
+            with self.assertRaises(ValueError):
+                puzzles[0][1]()
+
+    def test_bad_puzzle_keeps_going(self):
+        puzzle = {'id': 'good', 'size': 2, 'matches': [['a', 'A'], ['x', 'x']], 'cards': [['x', 'a', 'A', 'x']] * 4}
+        path = self.write('puzzles.jsonl', '\n'.join([
+            json.dumps({'id': 'bad', 'matches': [], 'cards': []}),
+            json.dumps(puzzle),
+        ]))
+        out = subprocess.run(
+            [sys.executable, 'magic_square.py', path, '--json', '--limit', '1'],
+            cwd=HERE, check=True, capture_output=True, text=True,
+        ).stdout
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(records[0], {'id': 'bad', 'error': "puzzle has no 'size'"})
+        self.assertEqual([r['id'] for r in records[1:]], ['good'])
+
+if __name__ == '__main__':
+    unittest.main()